@@ -0,0 +1,91 @@
+"""
+Общий HTTP-клиент и вспомогательные функции для демонстрационных скриптов OCR Quality Assessment API
+"""
+
+import atexit
+import json
+import time
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Размер пула keep-alive соединений HTTP-сессии
+HTTP_POOL_SIZE = 32
+
+# Повторы запросов при временных ошибках (экспоненциальная задержка)
+HTTP_RETRY_TOTAL = 3
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_RETRY_STATUSES = (429, 502, 503, 504)
+
+# Время жизни результата проверки /health и таймаут самой проверки (сек)
+HEALTH_CACHE_TTL = 5.0
+HEALTH_CHECK_TIMEOUT = 2.0
+
+# Кэш проверок доступности сервера: base_url -> (время проверки, сервер доступен)
+_health_cache: Dict[str, Tuple[float, bool]] = {}
+
+@lru_cache(maxsize=4)
+def get_session(base_url: str) -> requests.Session:
+    """
+    Общая для процесса HTTP-сессия для указанного сервера
+    
+    Args:
+        base_url: Базовый URL API
+    
+    Returns:
+        Сессия с пулом соединений и повтором временных ошибок
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=HTTP_RETRY_TOTAL,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    atexit.register(session.close)
+    
+    return session
+
+def server_available(base_url: str) -> bool:
+    """
+    Проверка доступности сервера (результат кэшируется на HEALTH_CACHE_TTL секунд)
+    
+    Args:
+        base_url: Базовый URL API
+    
+    Returns:
+        True, если /health отвечает 200
+    """
+    now = time.monotonic()
+    cached = _health_cache.get(base_url)
+    if cached is not None and now - cached[0] < HEALTH_CACHE_TTL:
+        return cached[1]
+    
+    response = get_session(base_url).get(f"{base_url}/health", timeout=HEALTH_CHECK_TIMEOUT)
+    available = response.status_code == 200
+    _health_cache[base_url] = (now, available)
+    
+    return available
+
+def dumps_pretty(data: Any) -> str:
+    """Форматированная сериализация JSON (orjson, если установлен)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, ensure_ascii=False, indent=2)
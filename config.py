@@ -1,5 +1,7 @@
 import os
-from typing import List, Dict, Any
+import re
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping
 
 class Config:
     """Конфигурация приложения"""
@@ -12,24 +14,32 @@ class Config:
     # Настройки сервера
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 8000))
+    # Число процессов uvicorn (каждый загружает свою модель OCR; на Windows - только 1)
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 1))
     
     # Настройки OCR
-    OCR_LANGUAGES = ["ru", "en"]
+    OCR_LANGUAGES = ("ru", "en")
     OCR_GPU_ENABLED = os.getenv("OCR_GPU_ENABLED", "False").lower() == "true"
+    # Устройство EasyOCR: auto (CUDA, затем MPS, иначе CPU), cpu, cuda, cuda:N или mps
+    OCR_DEVICE = os.getenv("OCR_DEVICE", "auto" if OCR_GPU_ENABLED else "cpu").lower()
+    # Динамическое INT8-квантование LSTM/Linear-слоев распознавателя EasyOCR на CPU
+    OCR_QUANTIZE = os.getenv("OCR_QUANTIZE", "True").lower() == "true"
+    # Распознавание в FP16 (autocast) на CUDA; включать после проверки качества на своих документах
+    OCR_FP16 = os.getenv("OCR_FP16", "False").lower() == "true"
     OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "0.5"))
     
     # Настройки обработки изображений
     MAX_IMAGE_SIZE = int(os.getenv("MAX_IMAGE_SIZE", 10 * 1024 * 1024))  # 10MB
-    SUPPORTED_IMAGE_FORMATS = ["jpg", "jpeg", "png", "bmp", "tiff"]
+    SUPPORTED_IMAGE_FORMATS = ("jpg", "jpeg", "png", "bmp", "tiff")
     
     # Настройки метрик
     METRICS_PRECISION = int(os.getenv("METRICS_PRECISION", 4))
     
     # Настройки извлечения данных
-    DEFAULT_FIELDS = [
+    DEFAULT_FIELDS = (
         "name", "date", "phone", "email", 
         "address", "passport", "inn", "amount"
-    ]
+    )
     
     # Настройки обработки шума
     NOISE_REDUCTION_ENABLED = True
@@ -40,9 +50,9 @@ class Config:
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
     # Настройки CORS
-    CORS_ORIGINS = ["*"]
-    CORS_METHODS = ["*"]
-    CORS_HEADERS = ["*"]
+    CORS_ORIGINS = ("*",)
+    CORS_METHODS = ("*",)
+    CORS_HEADERS = ("*",)
     
     # Настройки валидации
     JSON_VALIDATION_ENABLED = True
@@ -50,53 +60,73 @@ class Config:
     
     # Настройки производительности
     MAX_WORKERS = int(os.getenv("MAX_WORKERS", 4))
+    # Потоки torch на один вызов OCR: ядра делятся между всеми параллельными вызовами
+    # (MAX_WORKERS потоков в каждом из SERVER_WORKERS процессов)
+    OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", max(1, (os.cpu_count() or 1) // (SERVER_WORKERS * MAX_WORKERS))))
+    # Внутренние потоки OpenCV (0 - отключены: изображения и так обрабатываются параллельно пулами потоков)
+    OPENCV_THREADS = int(os.getenv("OPENCV_THREADS", 0))
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 300))  # 5 минут
     
     # Настройки кэширования
     CACHE_ENABLED = os.getenv("CACHE_ENABLED", "False").lower() == "true"
     CACHE_TTL = int(os.getenv("CACHE_TTL", 3600))  # 1 час
     
+    # Словари конфигурации собираются один раз при загрузке класса
+    _OCR_CONFIG = MappingProxyType({
+        "languages": OCR_LANGUAGES,
+        "gpu": OCR_GPU_ENABLED,
+        "device": OCR_DEVICE,
+        "quantize": OCR_QUANTIZE,
+        "fp16": OCR_FP16,
+        "min_confidence": OCR_MIN_CONFIDENCE
+    })
+    
+    _PROCESSING_CONFIG = MappingProxyType({
+        "max_image_size": MAX_IMAGE_SIZE,
+        "supported_formats": SUPPORTED_IMAGE_FORMATS,
+        "noise_reduction": NOISE_REDUCTION_ENABLED,
+        "noise_threshold": NOISE_DETECTION_THRESHOLD
+    })
+    
+    _VALIDATION_CONFIG = MappingProxyType({
+        "json_validation": JSON_VALIDATION_ENABLED,
+        "schema_validation": SCHEMA_VALIDATION_ENABLED,
+        "default_fields": DEFAULT_FIELDS
+    })
+    
+    _SERVER_CONFIG = MappingProxyType({
+        "host": HOST,
+        "port": PORT,
+        "workers": SERVER_WORKERS,
+        "debug": DEBUG,
+        "max_workers": MAX_WORKERS,
+        "torch_threads": OCR_TORCH_THREADS,
+        "opencv_threads": OPENCV_THREADS,
+        "request_timeout": REQUEST_TIMEOUT
+    })
+    
     @classmethod
-    def get_ocr_config(cls) -> Dict[str, Any]:
-        """Получение конфигурации OCR"""
-        return {
-            "languages": cls.OCR_LANGUAGES,
-            "gpu": cls.OCR_GPU_ENABLED,
-            "min_confidence": cls.OCR_MIN_CONFIDENCE
-        }
+    def get_ocr_config(cls) -> Mapping[str, Any]:
+        """Получение конфигурации OCR (неизменяемое представление)"""
+        return cls._OCR_CONFIG
     
     @classmethod
-    def get_processing_config(cls) -> Dict[str, Any]:
-        """Получение конфигурации обработки"""
-        return {
-            "max_image_size": cls.MAX_IMAGE_SIZE,
-            "supported_formats": cls.SUPPORTED_IMAGE_FORMATS,
-            "noise_reduction": cls.NOISE_REDUCTION_ENABLED,
-            "noise_threshold": cls.NOISE_DETECTION_THRESHOLD
-        }
+    def get_processing_config(cls) -> Mapping[str, Any]:
+        """Получение конфигурации обработки (неизменяемое представление)"""
+        return cls._PROCESSING_CONFIG
     
     @classmethod
-    def get_validation_config(cls) -> Dict[str, Any]:
-        """Получение конфигурации валидации"""
-        return {
-            "json_validation": cls.JSON_VALIDATION_ENABLED,
-            "schema_validation": cls.SCHEMA_VALIDATION_ENABLED,
-            "default_fields": cls.DEFAULT_FIELDS
-        }
+    def get_validation_config(cls) -> Mapping[str, Any]:
+        """Получение конфигурации валидации (неизменяемое представление)"""
+        return cls._VALIDATION_CONFIG
     
     @classmethod
-    def get_server_config(cls) -> Dict[str, Any]:
-        """Получение конфигурации сервера"""
-        return {
-            "host": cls.HOST,
-            "port": cls.PORT,
-            "debug": cls.DEBUG,
-            "max_workers": cls.MAX_WORKERS,
-            "request_timeout": cls.REQUEST_TIMEOUT
-        }
+    def get_server_config(cls) -> Mapping[str, Any]:
+        """Получение конфигурации сервера (неизменяемое представление)"""
+        return cls._SERVER_CONFIG
 
 # Схемы для валидации
-DEFAULT_SCHEMAS = {
+DEFAULT_SCHEMAS = MappingProxyType({
     "person_document": {
         "type": "object",
         "properties": {
@@ -127,58 +157,64 @@ DEFAULT_SCHEMAS = {
         },
         "required": ["name", "passport"]
     }
-}
+})
 
 # Паттерны для извлечения полей
-FIELD_PATTERNS = {
-    "name": [
+FIELD_PATTERNS = MappingProxyType({
+    "name": (
         r"(?:имя|name|фио|ф\.и\.о\.?)\s*:?\s*([а-яё\s]+)",
         r"([А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+(?:\s+[А-ЯЁ][а-яё]+)?)"
-    ],
-    "date": [
+    ),
+    "date": (
         r"(?:дата|date)\s*:?\s*(\d{1,2}[./]\d{1,2}[./]\d{2,4})",
         r"(\d{1,2}[./]\d{1,2}[./]\d{2,4})"
-    ],
-    "phone": [
+    ),
+    "phone": (
         r"(?:телефон|phone|тел\.?)\s*:?\s*([+]?[0-9\s\-\(\)]+)",
         r"([+]?[0-9\s\-\(\)]{10,})"
-    ],
-    "email": [
+    ),
+    "email": (
         r"(?:email|почта|e-mail)\s*:?\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",
         r"([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})"
-    ],
-    "address": [
+    ),
+    "address": (
         r"(?:адрес|address|адр\.?)\s*:?\s*([а-яё\s\d,.-]+)",
         r"(г\.\s*[а-яё\s]+,\s*[а-яё\s\d,.-]+)"
-    ],
-    "passport": [
+    ),
+    "passport": (
         r"(?:паспорт|passport|пасп\.?)\s*:?\s*(\d{4}\s*\d{6})",
         r"(\d{4}\s*\d{6})"
-    ],
-    "inn": [
+    ),
+    "inn": (
         r"(?:инн|inn)\s*:?\s*(\d{10,12})",
         r"(\d{10,12})"
-    ],
-    "amount": [
+    ),
+    "amount": (
         r"(?:сумма|amount|сумм\.?)\s*:?\s*(\d+(?:[.,]\d+)?)",
         r"(\d+(?:[.,]\d+)?\s*(?:руб|р\.?|₽))"
-    ]
-}
+    )
+})
+
+# Скомпилированные паттерны (компилируются один раз при импорте)
+FIELD_PATTERNS_COMPILED = MappingProxyType({
+    field_name: tuple(re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in patterns)
+    for field_name, patterns in FIELD_PATTERNS.items()
+})
 
 # Настройки обработки шума
-NOISE_PROCESSING_CONFIG = {
+NOISE_PROCESSING_CONFIG = MappingProxyType({
     "gaussian_blur": {"kernel_size": (3, 3), "sigma": 0},
     "median_blur": {"kernel_size": 3},
     "morphology": {"kernel_size": (2, 2)},
     "adaptive_threshold": {"max_value": 255, "block_size": 11, "c": 2},
     "clahe": {"clip_limit": 2.0, "tile_grid_size": (8, 8)}
-}
+})
 
 # Настройки метрик
-METRICS_CONFIG = {
+METRICS_CONFIG = MappingProxyType({
     "cer_weight": 0.4,
     "wer_weight": 0.3,
     "levenshtein_weight": 0.3,
     "precision_digits": 4,
     "exact_match_bonus": 0.1
-}
+})
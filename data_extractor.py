@@ -1,48 +1,271 @@
 import re
 import json
+import hashlib
+import operator
+import threading
 import jsonschema
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 
+from config import Config, DEFAULT_SCHEMAS, FIELD_PATTERNS_COMPILED
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
 logger = logging.getLogger(__name__)
 
+# Флаги компиляции паттернов полей
+FIELD_PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+# Итоговые флаги паттерна, скомпилированного с FIELD_PATTERN_FLAGS (с неявным re.UNICODE)
+COMPILED_PATTERN_FLAGS = re.compile('', FIELD_PATTERN_FLAGS).flags
+
+# Флаги Hyperscan: регистронезависимо, UTF-8 и левая граница совпадения
+HYPERSCAN_FLAGS = (
+    hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_UTF8 |
+    hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SOM_LEFTMOST
+) if hyperscan is not None else 0
+
+# Предкомпилированные регулярные выражения для нормализации
+PHONE_CLEANUP_RE = re.compile(r'[^\d+]')
+DATE_FORMAT_RE = re.compile(r'\d{1,2}\.\d{1,2}\.\d{2,4}')
+AMOUNT_NUMBER_RE = re.compile(r'(\d+(?:[.,]\d+)?)')
+
+# Таблицы str.translate для очистки без запуска регулярных выражений:
+# из телефона удаляются пробельные символы (как \s, все они <= U+3000) и скобки/дефисы
+PHONE_DROP_TABLE = dict.fromkeys(
+    [code for code in range(0x3001) if chr(code).isspace()] + [ord(ch) for ch in '()-']
+)
+DATE_SEPARATOR_TABLE = str.maketrans('/-', '..')
+
+# Тексты короче этого порога не кэшируются: извлечение дешевле поиска в кэше
+MIN_CACHED_TEXT_LENGTH = 32
+
+@lru_cache(maxsize=256)
+def _hyperscan_supports(expression: bytes) -> bool:
+    """Проверка, что Hyperscan может скомпилировать выражение"""
+    try:
+        hyperscan.Database().compile(
+            expressions=[expression], ids=[0], elements=1, flags=[HYPERSCAN_FLAGS]
+        )
+        return True
+    except Exception:
+        return False
+
+@lru_cache(maxsize=32)
+def _compile_hyperscan_db(pattern_set: Tuple[Tuple[str, Tuple[bytes, ...]], ...]):
+    """
+    Компиляция набора паттернов полей в единую базу Hyperscan (кэшируется по набору)
+    
+    Args:
+        pattern_set: Кортеж (имя поля, выражения паттернов поля в UTF-8)
+    
+    Returns:
+        (база, (поле, индекс паттерна) по id выражения, поля в базе) или None
+    """
+    expressions = []
+    hs_ids = []
+    for field_name, field_expressions in pattern_set:
+        # Поле переводится на Hyperscan, только если компилируются все его паттерны
+        if not all(_hyperscan_supports(expression) for expression in field_expressions):
+            continue
+        for pattern_index, expression in enumerate(field_expressions):
+            expressions.append(expression)
+            hs_ids.append((field_name, pattern_index))
+    
+    if not expressions:
+        return None
+    
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[HYPERSCAN_FLAGS] * len(expressions)
+        )
+    except Exception as e:
+        logger.warning(f"Hyperscan недоступен для паттернов полей, используется re: {str(e)}")
+        return None
+    
+    return db, tuple(hs_ids), frozenset(field_name for field_name, _ in hs_ids)
+
+@lru_cache(maxsize=4096)
+def _char_set(value: str) -> frozenset:
+    """Множество символов строки без учета регистра (кэшируется для повторяющихся значений)"""
+    return frozenset(value.lower())
+
+def _jaccard(a: str, b: str) -> float:
+    """Коэффициент Жаккара по множествам символов двух строк"""
+    a_chars = _char_set(a)
+    b_chars = _char_set(b)
+    common = len(a_chars & b_chars)
+    total = len(a_chars) + len(b_chars) - common
+    return common / total if total else 0.0
+
+# Общий неизменяемый пустой словарь для отсутствующих данных
+EMPTY_DATA = MappingProxyType({})
+
+@lru_cache(maxsize=128)
+def _build_schema_validator(schema_key: str):
+    """Построение и проверка валидатора по сериализованной схеме"""
+    schema = json.loads(schema_key)
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+# Версии JSON Schema, которые компилирует fastjsonschema
+FAST_SCHEMA_DRAFTS = (
+    "http://json-schema.org/draft-04/schema",
+    "http://json-schema.org/draft-06/schema",
+    "http://json-schema.org/draft-07/schema",
+)
+
+@lru_cache(maxsize=128)
+def _build_fast_schema_validator(schema_key: str):
+    """
+    Компиляция валидатора fastjsonschema по сериализованной схеме
+    
+    Returns:
+        Скомпилированная функция проверки или None, если версия схемы не поддерживается
+    """
+    schema = json.loads(schema_key)
+    # Некорректные схемы отклоняются так же, как при проверке через jsonschema
+    _build_schema_validator(schema_key)
+    
+    # Без явного $schema jsonschema применяет последнюю версию (2020-12), которую
+    # fastjsonschema не поддерживает, поэтому такие схемы проверяются через jsonschema
+    draft = schema.get("$schema") if isinstance(schema, dict) else None
+    if not isinstance(draft, str) or draft.rstrip("#") not in FAST_SCHEMA_DRAFTS:
+        return None
+    
+    # Форматы и значения по умолчанию отключены, как и в jsonschema.validate
+    return fastjsonschema.compile(schema, use_default=False, use_formats=False)
+
+def _schema_key(schema: Dict[str, Any]) -> str:
+    """Каноническая сериализация схемы для ключа кэша"""
+    return json.dumps(schema, sort_keys=True, ensure_ascii=False)
+
+def get_schema_validator(schema: Dict[str, Any]):
+    """
+    Получение валидатора JSON Schema из кэша
+    
+    Валидатор строится один раз для каждой уникальной схемы,
+    ключом служит ее каноническая JSON-сериализация.
+    
+    Args:
+        schema: JSON Schema
+        
+    Returns:
+        Экземпляр валидатора jsonschema
+    """
+    return _build_schema_validator(_schema_key(schema))
+
+@lru_cache(maxsize=128)
+def schema_key_from_text(schema_text: str) -> Optional[str]:
+    """
+    Каноническая сериализация схемы, переданной JSON-строкой
+    
+    Разбор текста кэшируется, поэтому повторяющиеся в запросах схемы
+    не разбираются и не сериализуются заново.
+    
+    Args:
+        schema_text: JSON Schema в виде строки
+        
+    Returns:
+        Ключ схемы для validate_schema_by_key или None для пустой схемы
+    """
+    schema = json.loads(schema_text)
+    return _schema_key(schema) if schema else None
+
+# Имена стандартных схем по их канонической сериализации
+DEFAULT_SCHEMA_NAMES = {_schema_key(schema): name for name, schema in DEFAULT_SCHEMAS.items()}
+
 class DataExtractor:
-    def __init__(self):
-        """Инициализация экстрактора данных"""
-        self.field_patterns = {
-            'name': [
-                r'(?:имя|name|фио|ф\.и\.о\.?)\s*:?\s*([а-яё\s]+)',
-                r'([А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+(?:\s+[А-ЯЁ][а-яё]+)?)'
-            ],
-            'date': [
-                r'(?:дата|date)\s*:?\s*(\d{1,2}[./]\d{1,2}[./]\d{2,4})',
-                r'(\d{1,2}[./]\d{1,2}[./]\d{2,4})'
-            ],
-            'phone': [
-                r'(?:телефон|phone|тел\.?)\s*:?\s*([+]?[0-9\s\-\(\)]+)',
-                r'([+]?[0-9\s\-\(\)]{10,})'
-            ],
-            'email': [
-                r'(?:email|почта|e-mail)\s*:?\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
-                r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-            ],
-            'address': [
-                r'(?:адрес|address|адр\.?)\s*:?\s*([а-яё\s\d,.-]+)',
-                r'(г\.\s*[а-яё\s]+,\s*[а-яё\s\d,.-]+)'
-            ],
-            'passport': [
-                r'(?:паспорт|passport|пасп\.?)\s*:?\s*(\d{4}\s*\d{6})',
-                r'(\d{4}\s*\d{6})'
-            ],
-            'inn': [
-                r'(?:инн|inn)\s*:?\s*(\d{10,12})',
-                r'(\d{10,12})'
-            ],
-            'amount': [
-                r'(?:сумма|amount|сумм\.?)\s*:?\s*(\d+(?:[.,]\d+)?)',
-                r'(\d+(?:[.,]\d+)?\s*(?:руб|р\.?|₽))'
-            ]
+    def __init__(self, cache_size: int = 1024):
+        """
+        Инициализация экстрактора данных
+        
+        Args:
+            cache_size: Размер LRU-кэша результатов extract_fields (0 - без кэша)
+        """
+        # Паттерны полей скомпилированы один раз при импорте config
+        self.field_patterns = dict(FIELD_PATTERNS_COMPILED)
+        
+        # Таблица нормализаторов значений по типу поля
+        self._normalizers = {
+            'phone': self._normalize_phone,
+            'email': str.lower,
+            'date': self._normalize_date,
+            'amount': self._normalize_amount,
+            'name': self._normalize_name
         }
+        
+        # DFA-сканер Hyperscan (если библиотека установлена)
+        self._hs_db = None
+        self._hs_ids = ()
+        self._hs_fields = frozenset()
+        self._hs_local = threading.local()
+        self._build_hyperscan_db()
+        
+        # LRU-кэш результатов extract_fields по (BLAKE2-хэш текста, ожидаемые поля):
+        # сами документы в кэше не хранятся
+        self._extract_cache_size = cache_size
+        self._extract_cache = OrderedDict()
+        self._extract_cache_lock = threading.Lock()
+        self._extract_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        
+        # Скомпилированные в Python-код валидаторы стандартных схем (fastjsonschema)
+        self._fast_validators = {}
+        if fastjsonschema is not None:
+            for name, schema in DEFAULT_SCHEMAS.items():
+                # Форматы и значения по умолчанию отключены, как и в jsonschema.validate
+                self._fast_validators[name] = fastjsonschema.compile(
+                    schema, use_default=False, use_formats=False
+                )
+    
+    @staticmethod
+    def _compile_patterns(patterns: List[Any]) -> List[re.Pattern]:
+        """Компиляция списка паттернов (уже скомпилированные остаются как есть)"""
+        return [
+            pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, FIELD_PATTERN_FLAGS)
+            for pattern in patterns
+        ]
+    
+    def _build_hyperscan_db(self):
+        """
+        Подключение общей базы Hyperscan для паттернов полей
+        
+        Hyperscan не поддерживает группы захвата, поэтому база используется
+        только для поиска начала первого совпадения каждого паттерна,
+        а значение поля извлекается скомпилированным паттерном re с этой позиции.
+        База компилируется один раз на набор паттернов и разделяется экземплярами.
+        """
+        self._hs_db = None
+        self._hs_ids = ()
+        self._hs_fields = frozenset()
+        
+        if hyperscan is None:
+            return
+        
+        pattern_set = tuple(
+            (field_name, tuple(pattern.pattern.encode('utf-8') for pattern in patterns))
+            for field_name, patterns in self.field_patterns.items()
+            if all(p.flags == COMPILED_PATTERN_FLAGS and p.groups <= 1 for p in patterns)
+        )
+        compiled = _compile_hyperscan_db(pattern_set)
+        if compiled is not None:
+            self._hs_db, self._hs_ids, self._hs_fields = compiled
     
     def extract_fields(self, text: str, expected_fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """
@@ -56,26 +279,144 @@ class DataExtractor:
             Словарь с извлеченными данными
         """
         try:
-            extracted_data = {}
+            # Повторные вызовы для того же текста обслуживаются из кэша
+            cache_key = None
+            if self._extract_cache_size and isinstance(text, str) and len(text) >= MIN_CACHED_TEXT_LENGTH:
+                cache_key = (
+                    hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest(),
+                    tuple(expected_fields) if expected_fields else None
+                )
+                with self._extract_cache_lock:
+                    cached = self._extract_cache.get(cache_key)
+                    if cached is not None:
+                        self._extract_cache.move_to_end(cache_key)
+                        self._extract_cache_stats['hits'] += 1
+                        return dict(cached)
+                    self._extract_cache_stats['misses'] += 1
             
             # Если указаны ожидаемые поля, извлекаем только их
+            # Неизвестные поля отбрасываются здесь один раз (в результат они бы
+            # все равно не попали), дальше поля не перепроверяются
             if expected_fields:
-                for field in expected_fields:
-                    extracted_data[field] = self._extract_field(text, field)
+                fields = [field for field in expected_fields if field in self.field_patterns]
+            else:
+                fields = list(self.field_patterns.keys())
+            
+            if self._hs_db is not None:
+                extracted_data = self._extract_fields_hyperscan(text, fields)
             else:
-                # Извлекаем все доступные поля
-                for field_name, patterns in self.field_patterns.items():
-                    extracted_data[field_name] = self._extract_field(text, field_name)
+                extracted_data = {}
+                for field in fields:
+                    extracted_data[field] = self._extract_field_unchecked(text, field)
             
             # Очистка и валидация данных
             extracted_data = self._clean_extracted_data(extracted_data)
             
+            if cache_key is not None:
+                with self._extract_cache_lock:
+                    self._extract_cache[cache_key] = dict(extracted_data)
+                    if len(self._extract_cache) > self._extract_cache_size:
+                        self._extract_cache.popitem(last=False)
+                        self._extract_cache_stats['evictions'] += 1
+            
             return extracted_data
             
         except Exception as e:
             logger.error(f"Ошибка при извлечении полей: {str(e)}")
             return {}
     
+    def extract_cache_info(self) -> Dict[str, int]:
+        """Статистика кэша извлечения полей (попадания, промахи, вытеснения, размер)"""
+        with self._extract_cache_lock:
+            return {**self._extract_cache_stats, 'size': len(self._extract_cache), 'maxsize': self._extract_cache_size}
+    
+    def clear_extract_cache(self):
+        """Очистка кэша извлечения полей"""
+        with self._extract_cache_lock:
+            self._extract_cache.clear()
+    
+    def extract_fields_batch(self, texts: List[str], expected_fields: Optional[List[str]] = None,
+                             max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Извлечение структурированных данных из нескольких текстов
+        
+        Тексты обрабатываются пулом потоков, скомпилированные паттерны
+        общие для всех потоков. Порядок результатов совпадает с порядком текстов.
+        
+        Args:
+            texts: Список OCR текстов
+            expected_fields: Список ожидаемых полей
+            max_workers: Количество потоков (по умолчанию Config.MAX_WORKERS)
+            
+        Returns:
+            Список словарей с извлеченными данными
+        """
+        workers = min(max_workers or Config.MAX_WORKERS, len(texts))
+        if workers <= 1:
+            return [self.extract_fields(text, expected_fields) for text in texts]
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda text: self.extract_fields(text, expected_fields), texts))
+    
+    def _hyperscan_scratch(self):
+        """Scratch-память Hyperscan текущего потока (общую использовать нельзя)"""
+        local = self._hs_local
+        if getattr(local, 'database', None) is not self._hs_db:
+            local.scratch = hyperscan.Scratch(self._hs_db)
+            local.database = self._hs_db
+        return local.scratch
+    
+    def _extract_fields_hyperscan(self, text: str, fields: List[str]) -> Dict[str, Any]:
+        """
+        Извлечение полей одним линейным проходом Hyperscan
+        
+        Hyperscan находит начало первого совпадения каждого паттерна,
+        после чего значение извлекается паттерном re с этой позиции.
+        Паттерны без совпадений не запускаются вовсе, результат совпадает
+        с последовательным перебором паттернов в _extract_field.
+        
+        Args:
+            text: Исходный текст
+            fields: Список извлекаемых полей
+            
+        Returns:
+            Словарь с извлеченными значениями
+        """
+        data = text.encode('utf-8')
+        first_starts = {}
+        
+        def on_match(pattern_id, start, end, flags, context):
+            if start < first_starts.get(pattern_id, start + 1):
+                first_starts[pattern_id] = start
+        
+        self._hs_db.scan(data, match_event_handler=on_match, scratch=self._hyperscan_scratch())
+        
+        # Переводим байтовые смещения в позиции символов
+        char_starts = {}
+        for pattern_id, start in first_starts.items():
+            char_starts[self._hs_ids[pattern_id]] = len(data[:start].decode('utf-8'))
+        
+        extracted_data = {}
+        for field in fields:
+            if field not in self._hs_fields:
+                extracted_data[field] = self._extract_field_unchecked(text, field)
+                continue
+            
+            value = None
+            for pattern_index, pattern in enumerate(self.field_patterns[field]):
+                start = char_starts.get((field, pattern_index))
+                if start is None:
+                    continue
+                match = pattern.search(text, start)
+                candidate = (match.group(pattern.groups) or '') if match else ''
+                if candidate.strip():
+                    value = self._clean_field_value(candidate.strip(), field)
+                    break
+            
+            extracted_data[field] = value
+        
+        return extracted_data
+    
     def _extract_field(self, text: str, field_name: str) -> Optional[str]:
         """
         Извлечение конкретного поля из текста
@@ -87,25 +428,23 @@ class DataExtractor:
         Returns:
             Извлеченное значение поля или None
         """
-        try:
-            if field_name not in self.field_patterns:
-                return None
-            
-            patterns = self.field_patterns[field_name]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-                if matches:
-                    # Возвращаем первое найденное значение
-                    value = matches[0].strip()
-                    if value:
-                        return self._clean_field_value(value, field_name)
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Ошибка при извлечении поля {field_name}: {str(e)}")
+        if field_name not in self.field_patterns:
             return None
+        
+        return self._extract_field_unchecked(text, field_name)
+    
+    def _extract_field_unchecked(self, text: str, field_name: str) -> Optional[str]:
+        """Извлечение поля, наличие которого в field_patterns уже проверено"""
+        for pattern in self.field_patterns[field_name]:
+            # Нужно только первое совпадение: search останавливается на нем,
+            # а findall собирал бы все совпадения по тексту
+            match = pattern.search(text)
+            if match:
+                value = (match.group(min(pattern.groups, 1)) or '').strip()
+                if value:
+                    return self._clean_field_value(value, field_name)
+        
+        return None
     
     def _clean_field_value(self, value: str, field_name: str) -> str:
         """
@@ -118,84 +457,49 @@ class DataExtractor:
         Returns:
             Очищенное значение
         """
-        try:
-            # Базовая очистка
-            cleaned = value.strip()
-            
-            # Специфичная очистка для разных типов полей
-            if field_name == 'phone':
-                # Удаление всех символов кроме цифр и +
-                cleaned = re.sub(r'[^\d+]', '', cleaned)
-            elif field_name == 'email':
-                # Приведение к нижнему регистру
-                cleaned = cleaned.lower()
-            elif field_name == 'date':
-                # Нормализация формата даты
-                cleaned = self._normalize_date(cleaned)
-            elif field_name == 'amount':
-                # Нормализация суммы
-                cleaned = self._normalize_amount(cleaned)
-            elif field_name == 'name':
-                # Нормализация имени
-                cleaned = self._normalize_name(cleaned)
-            
+        # Базовая очистка и специфичная нормализация по таблице полей
+        cleaned = value.strip()
+        normalizer = self._normalizers.get(field_name)
+        return normalizer(cleaned) if normalizer else cleaned
+    
+    def _normalize_phone(self, phone_str: str) -> str:
+        """Нормализация телефона: удаление всех символов кроме цифр и +"""
+        cleaned = phone_str.translate(PHONE_DROP_TABLE)
+        
+        # Значения из стандартных паттернов содержат только цифры, +, пробелы,
+        # скобки и дефисы; прочие символы убираются регулярным выражением
+        if cleaned.replace('+', '').isdecimal() or not cleaned:
             return cleaned
-            
-        except Exception as e:
-            logger.error(f"Ошибка при очистке поля {field_name}: {str(e)}")
-            return value
+        return PHONE_CLEANUP_RE.sub('', cleaned)
     
     def _normalize_date(self, date_str: str) -> str:
         """Нормализация даты"""
-        try:
-            # Замена разделителей на точки
-            normalized = re.sub(r'[/\-]', '.', date_str)
-            
-            # Проверка и исправление формата
-            if re.match(r'\d{1,2}\.\d{1,2}\.\d{2,4}', normalized):
-                return normalized
-            
-            return date_str
-            
-        except Exception as e:
-            logger.error(f"Ошибка при нормализации даты: {str(e)}")
-            return date_str
+        # Замена разделителей на точки
+        normalized = date_str.translate(DATE_SEPARATOR_TABLE)
+        
+        # Проверка и исправление формата
+        if DATE_FORMAT_RE.match(normalized):
+            return normalized
+        
+        return date_str
     
     def _normalize_amount(self, amount_str: str) -> str:
         """Нормализация суммы"""
-        try:
-            # Извлечение числа
-            match = re.search(r'(\d+(?:[.,]\d+)?)', amount_str)
-            if match:
-                amount = match.group(1)
-                # Замена запятой на точку
-                amount = amount.replace(',', '.')
-                return amount
-            
-            return amount_str
-            
-        except Exception as e:
-            logger.error(f"Ошибка при нормализации суммы: {str(e)}")
-            return amount_str
+        # Извлечение числа
+        match = AMOUNT_NUMBER_RE.search(amount_str)
+        if match:
+            amount = match.group(1)
+            # Замена запятой на точку
+            amount = amount.replace(',', '.')
+            return amount
+        
+        return amount_str
     
     def _normalize_name(self, name_str: str) -> str:
         """Нормализация имени"""
-        try:
-            # Удаление лишних пробелов и приведение к правильному регистру
-            words = name_str.split()
-            normalized_words = []
-            
-            for word in words:
-                if word:
-                    # Первая буква заглавная, остальные строчные
-                    normalized_word = word[0].upper() + word[1:].lower()
-                    normalized_words.append(normalized_word)
-            
-            return ' '.join(normalized_words)
-            
-        except Exception as e:
-            logger.error(f"Ошибка при нормализации имени: {str(e)}")
-            return name_str
+        # Удаление лишних пробелов и приведение каждого слова к виду "Первая заглавная"
+        # (str.capitalize на уровне C вместо посимвольной сборки слов)
+        return ' '.join(map(str.capitalize, name_str.split()))
     
     def _clean_extracted_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -207,18 +511,13 @@ class DataExtractor:
         Returns:
             Очищенный словарь
         """
-        try:
-            cleaned_data = {}
-            
-            for key, value in data.items():
-                if value is not None and str(value).strip():
-                    cleaned_data[key] = value
-            
-            return cleaned_data
-            
-        except Exception as e:
-            logger.error(f"Ошибка при очистке данных: {str(e)}")
-            return data
+        cleaned_data = {}
+        
+        for key, value in data.items():
+            if value is not None and str(value).strip():
+                cleaned_data[key] = value
+        
+        return cleaned_data
     
     def validate_json(self, data: Dict[str, Any]) -> bool:
         """
@@ -250,12 +549,42 @@ class DataExtractor:
         Returns:
             True если данные соответствуют схеме, False иначе
         """
+        if not schema:
+            return True
+        
         try:
-            if not schema:
-                return True
+            schema_key = _schema_key(schema)
+        except Exception as e:
+            logger.error(f"Ошибка при валидации схемы: {str(e)}")
+            return False
+        
+        return self.validate_schema_by_key(data, schema_key)
+    
+    def validate_schema_by_key(self, data: Dict[str, Any], schema_key: str) -> bool:
+        """
+        Проверка соответствия данных схеме по ее канонической сериализации
+        
+        Args:
+            data: Данные для проверки
+            schema_key: Ключ схемы (см. schema_key_from_text)
             
-            # Валидация с использованием jsonschema
-            jsonschema.validate(data, schema)
+        Returns:
+            True если данные соответствуют схеме, False иначе
+        """
+        try:
+            # Стандартные схемы проверяются быстрым валидатором
+            schema_name = DEFAULT_SCHEMA_NAMES.get(schema_key)
+            if schema_name in self._fast_validators:
+                return self.validate_schema_fast(data, schema_name)
+            
+            # Остальные схемы компилируются в Python-код один раз на схему
+            if fastjsonschema is not None:
+                fast_validator = _build_fast_schema_validator(schema_key)
+                if fast_validator is not None:
+                    return self._run_fast_validator(fast_validator, data)
+            
+            # Валидация кэшированным валидатором jsonschema
+            _build_schema_validator(schema_key).validate(data)
             return True
             
         except jsonschema.ValidationError as e:
@@ -265,6 +594,37 @@ class DataExtractor:
             logger.error(f"Ошибка при валидации схемы: {str(e)}")
             return False
     
+    def validate_schema_fast(self, data: Dict[str, Any], schema_name: str) -> bool:
+        """
+        Проверка соответствия данных стандартной схеме через fastjsonschema
+        
+        Args:
+            data: Данные для проверки
+            schema_name: Название схемы из DEFAULT_SCHEMAS
+            
+        Returns:
+            True если данные соответствуют схеме, False иначе
+        """
+        validator = self._fast_validators.get(schema_name)
+        if validator is None:
+            if schema_name not in DEFAULT_SCHEMAS:
+                logger.error(f"Неизвестная схема: {schema_name}")
+                return False
+            return self.validate_schema(data, DEFAULT_SCHEMAS[schema_name])
+        
+        return self._run_fast_validator(validator, data)
+    
+    @staticmethod
+    def _run_fast_validator(validator, data: Dict[str, Any]) -> bool:
+        """Проверка данных скомпилированным валидатором fastjsonschema"""
+        try:
+            validator(data)
+            return True
+            
+        except fastjsonschema.JsonSchemaException as e:
+            logger.error(f"Данные не соответствуют схеме: {str(e)}")
+            return False
+    
     def calculate_field_accuracy(self, extracted_data: Dict[str, Any], 
                                ground_truth_data: Dict[str, Any]) -> Dict[str, float]:
         """
@@ -312,37 +672,70 @@ class DataExtractor:
         try:
             field_f1 = {}
             
+            for field in ground_truth_data.keys():
+                field_f1[field] = self._field_f1(
+                    extracted_data.get(field, ""), ground_truth_data.get(field, "")
+                )
+            
+            return field_f1
+            
+        except Exception as e:
+            logger.error(f"Ошибка при расчете F1-score полей: {str(e)}")
+            return {}
+    
+    def calculate_field_metrics(self, extracted_data: Dict[str, Any], 
+                                ground_truth_data: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        """
+        Расчет точности и F1-score для каждого поля за один проход
+        
+        Значения полей читаются один раз, результат совпадает с
+        calculate_field_accuracy и calculate_f1_score_per_field.
+        
+        Args:
+            extracted_data: Извлеченные данные
+            ground_truth_data: Эталонные данные
+            
+        Returns:
+            Словарь вида {поле: {'accuracy': ..., 'f1': ...}}
+        """
+        try:
+            field_metrics = {}
+            
             for field in ground_truth_data.keys():
                 extracted_value = extracted_data.get(field, "")
                 ground_truth_value = ground_truth_data.get(field, "")
                 
-                if ground_truth_value:
-                    # Для простоты используем точное совпадение
-                    # В реальном проекте можно использовать более сложные метрики
-                    if extracted_value == ground_truth_value:
-                        field_f1[field] = 1.0
-                    else:
-                        # Частичное совпадение
-                        if extracted_value and ground_truth_value:
-                            # Простая метрика на основе длины совпадающих символов
-                            common_chars = set(extracted_value.lower()) & set(ground_truth_value.lower())
-                            total_chars = set(extracted_value.lower()) | set(ground_truth_value.lower())
-                            
-                            if total_chars:
-                                field_f1[field] = len(common_chars) / len(total_chars)
-                            else:
-                                field_f1[field] = 0.0
-                        else:
-                            field_f1[field] = 0.0
-                else:
-                    field_f1[field] = 0.0
+                accuracy = 1.0 if ground_truth_value and extracted_value == ground_truth_value else 0.0
+                field_metrics[field] = {
+                    'accuracy': accuracy,
+                    'f1': 1.0 if accuracy else self._field_f1(extracted_value, ground_truth_value)
+                }
             
-            return field_f1
+            return field_metrics
             
         except Exception as e:
-            logger.error(f"Ошибка при расчете F1-score полей: {str(e)}")
+            logger.error(f"Ошибка при расчете метрик полей: {str(e)}")
             return {}
     
+    @staticmethod
+    def _field_f1(extracted_value: Any, ground_truth_value: Any) -> float:
+        """
+        F1-score одного поля
+        
+        Точное совпадение дает 1.0, частичное - долю общих символов
+        (коэффициент Жаккара по множествам символов без учета регистра).
+        """
+        if not ground_truth_value:
+            return 0.0
+        
+        if extracted_value == ground_truth_value:
+            return 1.0
+        
+        if not extracted_value:
+            return 0.0
+        
+        return _jaccard(extracted_value, ground_truth_value)
+    
     def calculate_exact_match_percentage(self, results: List[Dict[str, Any]]) -> float:
         """
         Расчет процента документов, извлеченных полностью верно
@@ -357,32 +750,57 @@ class DataExtractor:
             if not results:
                 return 0.0
             
-            exact_matches = 0
+            # Проверка точного совпадения всех полей (без выделения пустых словарей)
+            exact_matches = sum(
+                1 for result in results
+                if result.get('extracted_data', EMPTY_DATA) == result.get('ground_truth_data', EMPTY_DATA)
+            )
             
-            for result in results:
-                extracted_data = result.get('extracted_data', {})
-                ground_truth_data = result.get('ground_truth_data', {})
-                
-                # Проверка точного совпадения всех полей
-                if extracted_data == ground_truth_data:
-                    exact_matches += 1
-            
-            return (exact_matches / len(results)) * 100
+            return 100.0 * exact_matches / len(results)
             
         except Exception as e:
             logger.error(f"Ошибка при расчете процента точных совпадений: {str(e)}")
             return 0.0
     
+    def calculate_exact_match_percentage_soa(self, extracted_list: List[Dict[str, Any]], 
+                                             ground_truth_list: List[Dict[str, Any]]) -> float:
+        """
+        Расчет процента точных совпадений по параллельным спискам результатов
+        
+        Вариант calculate_exact_match_percentage для данных, хранящихся
+        столбцами: извлеченные и эталонные данные сравниваются попарно
+        без обращения к словарю-обертке каждого документа.
+        
+        Args:
+            extracted_list: Извлеченные данные документов
+            ground_truth_list: Эталонные данные документов (в том же порядке)
+            
+        Returns:
+            Процент точных совпадений
+        """
+        if len(extracted_list) != len(ground_truth_list):
+            logger.error("Списки извлеченных и эталонных данных имеют разную длину")
+            return 0.0
+        
+        if not extracted_list:
+            return 0.0
+        
+        exact_matches = sum(map(operator.eq, extracted_list, ground_truth_list))
+        
+        return 100.0 * exact_matches / len(extracted_list)
+    
     def add_custom_field_pattern(self, field_name: str, patterns: List[str]):
         """
         Добавление пользовательского паттерна для поля
         
         Args:
             field_name: Название поля
-            patterns: Список регулярных выражений
+            patterns: Список регулярных выражений (строки или скомпилированные)
         """
         try:
-            self.field_patterns[field_name] = patterns
+            self.field_patterns[field_name] = self._compile_patterns(patterns)
+            self._build_hyperscan_db()
+            self.clear_extract_cache()
             logger.info(f"Добавлен паттерн для поля {field_name}")
             
         except Exception as e:
@@ -391,3 +809,11 @@ class DataExtractor:
     def get_available_fields(self) -> List[str]:
         """Получение списка доступных полей для извлечения"""
         return list(self.field_patterns.keys())
+
+
+def _prewarm_schema_validators():
+    """Предварительная сборка валидаторов для стандартных схем"""
+    for schema in DEFAULT_SCHEMAS.values():
+        get_schema_validator(schema)
+
+_prewarm_schema_validators()
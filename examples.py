@@ -3,14 +3,60 @@
 Примеры использования OCR Quality Assessment API
 """
 
+import asyncio
 import requests
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable
+
+import jsonschema
+
+from client import get_session, server_available, dumps_pretty
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Максимальное число одновременных запросов к API
+MAX_CONCURRENT_REQUESTS = 8
+
+# Схема валидации для примера 6
+EXAMPLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 1},
+        "date": {"type": "string", "pattern": r"^\d{1,2}[./]\d{1,2}[./]\d{2,4}$"},
+        "phone": {"type": "string", "pattern": r"^[+]?[0-9\s\-\(\)]+$"}
+    },
+    "required": ["name"]
+}
+
+def compile_schema_validator(schema: Dict[str, Any]) -> Callable[[Any], bool]:
+    """Однократная компиляция валидатора схемы (fastjsonschema, если установлен)"""
+    if fastjsonschema is None:
+        return jsonschema.Draft7Validator(schema).is_valid
+    
+    validate = fastjsonschema.compile(schema)
+    
+    def is_valid(data: Any) -> bool:
+        try:
+            validate(data)
+            return True
+        except fastjsonschema.JsonSchemaException:
+            return False
+    
+    return is_valid
+
+# Валидатор схемы примера 6 (компилируется один раз при импорте)
+is_valid_example_data = compile_schema_validator(EXAMPLE_SCHEMA)
 
 class OCRAPIExamples:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
+        
+        # Общая для процесса сессия переиспользует TCP-соединения между запросами
+        self.session = get_session(base_url)
     
     def example_1_basic_ocr(self):
         """Пример 1: Базовая обработка документа"""
@@ -23,7 +69,7 @@ class OCRAPIExamples:
         }
         
         # Тестируем расчет метрик
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/metrics/calculate",
             json=test_data
         )
@@ -47,7 +93,7 @@ class OCRAPIExamples:
             "ground_truth": "Иван Иванов 01.01.2023 +7(999)123-45-67"
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/metrics/calculate",
             json=test_data
         )
@@ -88,7 +134,7 @@ class OCRAPIExamples:
             "ground_truth": "Иван Иванов 01.01.2023 +7(999)123-45-67"
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/metrics/calculate",
             json=noisy_data
         )
@@ -140,17 +186,6 @@ class OCRAPIExamples:
         """Пример 6: Валидация схемы"""
         print("=== Пример 6: Валидация схемы ===")
         
-        # Пример схемы
-        schema = {
-            "type": "object",
-            "properties": {
-                "name": {"type": "string", "minLength": 1},
-                "date": {"type": "string", "pattern": r"^\d{1,2}[./]\d{1,2}[./]\d{2,4}$"},
-                "phone": {"type": "string", "pattern": r"^[+]?[0-9\s\-\(\)]+$"}
-            },
-            "required": ["name"]
-        }
-        
         # Данные, соответствующие схеме
         valid_data = {
             "name": "Иван Иванов",
@@ -166,19 +201,26 @@ class OCRAPIExamples:
         }
         
         print("Схема валидации:")
-        print(json.dumps(schema, indent=2, ensure_ascii=False))
+        print(dumps_pretty(EXAMPLE_SCHEMA))
         print()
         
         print("Тестирование валидных данных:")
-        print(json.dumps(valid_data, indent=2, ensure_ascii=False))
-        print("✓ Данные соответствуют схеме")
+        print(dumps_pretty(valid_data))
+        self._print_schema_result(valid_data)
         print()
         
         print("Тестирование невалидных данных:")
-        print(json.dumps(invalid_data, indent=2, ensure_ascii=False))
-        print("✗ Данные не соответствуют схеме")
+        print(dumps_pretty(invalid_data))
+        self._print_schema_result(invalid_data)
         print()
     
+    def _print_schema_result(self, data: Dict[str, Any]):
+        """Вывод результата проверки данных по схеме примера 6"""
+        if is_valid_example_data(data):
+            print("✓ Данные соответствуют схеме")
+        else:
+            print("✗ Данные не соответствуют схеме")
+    
     def example_7_batch_processing(self):
         """Пример 7: Пакетная обработка"""
         print("=== Пример 7: Пакетная обработка ===")
@@ -202,9 +244,22 @@ class OCRAPIExamples:
             }
         ]
         
+        # Метрики всех документов рассчитываются одним пакетным запросом
+        results = self._calculate_metrics_batch([
+            {
+                "extracted_text": doc["extracted_text"],
+                "ground_truth": doc["ground_truth"]
+            }
+            for doc in batch_data
+        ])
+        
         print("Пакетная обработка документов:")
-        for i, doc in enumerate(batch_data, 1):
+        for i, (doc, result) in enumerate(zip(batch_data, results), 1):
             print(f"  {i}. {doc['filename']}: {doc['extracted_text']}")
+            if result:
+                print(f"     CER: {result.get('cer', 'N/A')}, WER: {result.get('wer', 'N/A')}")
+            else:
+                print("     ✗ Ошибка при расчете метрик")
         
         print("✓ Пакетная обработка завершена")
         print()
@@ -232,15 +287,17 @@ class OCRAPIExamples:
             }
         ]
         
-        for case in test_cases:
+        # Все случаи отправляются параллельно, вывод - в исходном порядке
+        responses = self._post_metrics_many([
+            {
+                "extracted_text": case["extracted"],
+                "ground_truth": case["ground_truth"]
+            }
+            for case in test_cases
+        ])
+        
+        for case, response in zip(test_cases, responses):
             print(f"Тест: {case['name']}")
-            response = requests.post(
-                f"{self.base_url}/metrics/calculate",
-                json={
-                    "extracted_text": case["extracted"],
-                    "ground_truth": case["ground_truth"]
-                }
-            )
             
             if response.status_code == 200:
                 result = response.json()
@@ -250,6 +307,48 @@ class OCRAPIExamples:
                 print(f"  ✗ Ошибка: {response.status_code}")
         print()
     
+    def _post_metrics(self, payload: Dict[str, Any]) -> requests.Response:
+        """Отправка запроса на расчет метрик"""
+        return self.session.post(f"{self.base_url}/metrics/calculate", json=payload)
+    
+    async def _gather_metrics(self, payloads: List[Dict[str, Any]]) -> List[requests.Response]:
+        """Параллельная отправка запросов на расчет метрик"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        async def post(payload: Dict[str, Any]) -> requests.Response:
+            async with semaphore:
+                return await asyncio.to_thread(self._post_metrics, payload)
+        
+        return await asyncio.gather(*(post(payload) for payload in payloads))
+    
+    def _post_metrics_many(self, payloads: List[Dict[str, Any]]) -> List[requests.Response]:
+        """Отправка нескольких запросов на расчет метрик одновременно (порядок сохраняется)"""
+        return asyncio.run(self._gather_metrics(payloads))
+    
+    def _calculate_metrics_batch(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Расчет метрик для нескольких пар текстов
+        
+        Все пары отправляются одним запросом к пакетному эндпоинту. Если он
+        недоступен, запросы к /metrics/calculate выполняются одновременно.
+        Для неудачных запросов возвращается пустой словарь.
+        """
+        response = self.session.post(
+            f"{self.base_url}/metrics/calculate_batch",
+            json={"items": payloads}
+        )
+        if response.status_code == 200:
+            return response.json()["results"]
+        
+        return [
+            single.json() if single.status_code == 200 else {}
+            for single in self._post_metrics_many(payloads)
+        ]
+    
+    def _server_available(self) -> bool:
+        """Проверка доступности сервера (результат кэшируется)"""
+        return server_available(self.base_url)
+    
     def run_all_examples(self):
         """Запуск всех примеров"""
         print("Запуск примеров использования OCR Quality Assessment API")
@@ -258,11 +357,10 @@ class OCRAPIExamples:
         
         # Проверяем доступность сервера
         try:
-            response = requests.get(f"{self.base_url}/health")
-            if response.status_code != 200:
+            if not self._server_available():
                 print("✗ Сервер недоступен. Убедитесь, что сервер запущен.")
                 return
-        except requests.exceptions.ConnectionError:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
             print("✗ Не удается подключиться к серверу. Убедитесь, что сервер запущен.")
             return
         
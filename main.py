@@ -1,17 +1,22 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uvicorn
+import asyncio
 import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from ocr_service import OCRService
 from metrics_calculator import MetricsCalculator
-from data_extractor import DataExtractor
+from data_extractor import DataExtractor, schema_key_from_text
 from noise_handler import NoiseHandler
 from pdf_processor import PDFProcessor
+from config import Config
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +40,40 @@ data_extractor = DataExtractor()
 noise_handler = NoiseHandler()
 pdf_processor = PDFProcessor()
 
+# Пул потоков для CPU-нагруженной обработки (OCR, метрики), чтобы не блокировать event loop
+processing_executor = ThreadPoolExecutor(max_workers=Config.MAX_WORKERS, thread_name_prefix="ocr")
+
+# Ограничение числа одновременно обрабатываемых файлов пакета (память под загрузки)
+batch_semaphore = asyncio.Semaphore(Config.MAX_WORKERS)
+
+# Максимальные размеры загружаемых файлов
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_PDF_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB для PDF
+
+# Поддерживаемые форматы документов
+ALLOWED_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.pdf'})
+
+async def read_upload(file: UploadFile, max_size: int, too_large_detail: str) -> bytes:
+    """
+    Чтение загруженного файла с проверкой лимита размера
+    
+    Файл известного размера больше лимита отклоняется без чтения, иначе
+    читается не более max_size + 1 байт - этого достаточно для проверки лимита.
+    """
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=400, detail=too_large_detail)
+    
+    data = await file.read(max_size + 1)
+    if len(data) > max_size:
+        raise HTTPException(status_code=400, detail=too_large_detail)
+    
+    return data
+
+async def run_blocking(func, *args):
+    """Выполнение синхронной функции в пуле обработки без блокировки event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(processing_executor, partial(func, *args))
+
 class OCRRequest(BaseModel):
     image_path: Optional[str] = None
     ground_truth: Optional[str] = None
@@ -69,6 +108,21 @@ class OCRResponse(BaseModel):
     columns: Optional[List[ColumnData]] = None
     columns_count: Optional[int] = None
 
+class MetricsItem(BaseModel):
+    extracted_text: str
+    ground_truth: str
+
+class MetricsBatchRequest(BaseModel):
+    items: List[MetricsItem]
+
+# Модели ответов без фиксированной структуры: с response_model FastAPI сериализует
+# ответ сразу в JSON через pydantic-core, минуя jsonable_encoder и json.dumps
+class MetricsBatchResponse(BaseModel):
+    results: List[Dict[str, Any]]
+
+class BatchProcessResponse(BaseModel):
+    results: List[Dict[str, Any]]
+
 @app.post("/ocr/process", response_model=OCRResponse)
 async def process_document(
     file: UploadFile = File(...),
@@ -80,7 +134,6 @@ async def process_document(
     Обработка документа с OCR и оценкой качества
     """
     try:
-        import time
         start_time = time.time()
         
         # Валидация файла
@@ -88,77 +141,31 @@ async def process_document(
             raise HTTPException(status_code=400, detail="Файл не выбран")
         
         # Проверка типа файла
-        allowed_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.pdf'}
-        file_extension = os.path.splitext(file.filename.lower())[1]
-        if file_extension not in allowed_extensions:
-            raise HTTPException(status_code=400, detail=f"Неподдерживаемый формат файла. Разрешены: {allowed_extensions}")
+        # К нижнему регистру приводится только расширение, а не все имя файла
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        if file_extension not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Неподдерживаемый формат файла. Разрешены: {set(ALLOWED_EXTENSIONS)}")
         
-        # Чтение изображения
-        image_data = await file.read()
+        # Чтение изображения с проверкой размера файла
+        image_data = await read_upload(file, MAX_UPLOAD_SIZE, "Файл слишком большой (максимум 10MB)")
         
-        # Проверка размера файла
         if len(image_data) == 0:
             raise HTTPException(status_code=400, detail="Пустой файл")
         
-        if len(image_data) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail="Файл слишком большой (максимум 10MB)")
-        
         # Обработка параметров
         expected_fields_list = json.loads(expected_fields) if expected_fields else None
-        schema_dict = json.loads(schema) if schema else None
-        
-        # Определяем тип файла и обрабатываем соответственно
-        pages_data = None
-        total_pages = None
-        has_multiple_columns = None
-        columns_data = None
-        columns_count = None
-        
-        if file_extension == '.pdf':
-            # Обработка PDF файла с анализом страниц и столбцов
-            pdf_result = pdf_processor.extract_text_with_pages_and_columns(image_data)
-            extracted_text = pdf_result['full_text']
-            pages_data = pdf_result['pages']
-            total_pages = pdf_result['total_pages']
-            has_multiple_columns = pdf_result['has_multiple_columns']
-            logger.info(f"Обработан PDF файл: {file.filename}, страниц: {total_pages}")
-        else:
-            # Обработка изображения с анализом столбцов
-            ocr_result = ocr_service.extract_text_with_columns(image_data)
-            extracted_text = ocr_result['full_text']
-            columns_data = ocr_result['columns']
-            columns_count = ocr_result['columns_count']
-            has_multiple_columns = ocr_result['has_multiple_columns']
-            logger.info(f"Обработано изображение: {file.filename}, столбцов: {columns_count}")
-        
-        # Извлечение структурированных данных
-        structured_data = data_extractor.extract_fields(extracted_text, expected_fields_list)
-        
-        # Расчет метрик
-        metrics = {}
-        if ground_truth:
-            metrics = metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
-        
-        # Проверка JSON валидности
-        json_validity = data_extractor.validate_json(structured_data)
-        
-        # Проверка соответствия схеме
-        schema_consistency = data_extractor.validate_schema(structured_data, schema_dict) if schema_dict else True
-        
-        processing_time = time.time() - start_time
-        
-        return OCRResponse(
-            extracted_text=extracted_text,
-            structured_data=structured_data,
-            metrics=metrics,
-            json_validity=json_validity,
-            schema_consistency=schema_consistency,
-            processing_time=processing_time,
-            pages=pages_data,
-            total_pages=total_pages,
-            has_multiple_columns=has_multiple_columns,
-            columns=columns_data,
-            columns_count=columns_count
+        schema_key = schema_key_from_text(schema) if schema else None
+        
+        # OCR и расчет метрик выполняются в пуле потоков
+        return await run_blocking(
+            _process_document_data,
+            file.filename,
+            file_extension,
+            image_data,
+            ground_truth,
+            expected_fields_list,
+            schema_key,
+            start_time
         )
         
     except Exception as e:
@@ -168,29 +175,97 @@ async def process_document(
         logger.error(f"Детали ошибки: {error_details}")
         raise HTTPException(status_code=500, detail=f"Ошибка обработки: {str(e)}")
 
-@app.post("/ocr/batch-process")
+def _process_document_data(
+    filename: str,
+    file_extension: str,
+    image_data: bytes,
+    ground_truth: Optional[str],
+    expected_fields_list: Optional[List[str]],
+    schema_key: Optional[str],
+    start_time: float
+) -> OCRResponse:
+    """
+    Синхронная обработка содержимого документа (выполняется в пуле потоков)
+    """
+    # Определяем тип файла и обрабатываем соответственно
+    pages_data = None
+    total_pages = None
+    has_multiple_columns = None
+    columns_data = None
+    columns_count = None
+    
+    if file_extension == '.pdf':
+        # Обработка PDF файла с анализом страниц и столбцов
+        pdf_result = pdf_processor.extract_text_with_pages_and_columns(image_data)
+        extracted_text = pdf_result['full_text']
+        pages_data = pdf_result['pages']
+        total_pages = pdf_result['total_pages']
+        has_multiple_columns = pdf_result['has_multiple_columns']
+        logger.info(f"Обработан PDF файл: {filename}, страниц: {total_pages}")
+    else:
+        # Обработка изображения с анализом столбцов
+        ocr_result = ocr_service.extract_text_with_columns(image_data)
+        extracted_text = ocr_result['full_text']
+        columns_data = ocr_result['columns']
+        columns_count = ocr_result['columns_count']
+        has_multiple_columns = ocr_result['has_multiple_columns']
+        logger.info(f"Обработано изображение: {filename}, столбцов: {columns_count}")
+    
+    # Извлечение структурированных данных
+    structured_data = data_extractor.extract_fields(extracted_text, expected_fields_list)
+    
+    # Расчет метрик
+    metrics = {}
+    if ground_truth:
+        metrics = metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
+    
+    # Проверка JSON валидности
+    json_validity = data_extractor.validate_json(structured_data)
+    
+    # Проверка соответствия схеме
+    schema_consistency = data_extractor.validate_schema_by_key(structured_data, schema_key) if schema_key else True
+    
+    processing_time = time.time() - start_time
+    
+    return OCRResponse(
+        extracted_text=extracted_text,
+        structured_data=structured_data,
+        metrics=metrics,
+        json_validity=json_validity,
+        schema_consistency=schema_consistency,
+        processing_time=processing_time,
+        pages=pages_data,
+        total_pages=total_pages,
+        has_multiple_columns=has_multiple_columns,
+        columns=columns_data,
+        columns_count=columns_count
+    )
+
+@app.post("/ocr/batch-process", response_model=BatchProcessResponse)
 async def batch_process_documents(files: List[UploadFile] = File(...)):
     """
     Пакетная обработка документов
     """
-    results = []
+    async def process_file(file: UploadFile) -> Dict[str, Any]:
+        async with batch_semaphore:
+            try:
+                result = await process_document(file)
+                return {
+                    "filename": file.filename,
+                    "result": result.dict()
+                }
+            except Exception as e:
+                return {
+                    "filename": file.filename,
+                    "error": str(e)
+                }
     
-    for file in files:
-        try:
-            result = await process_document(file)
-            results.append({
-                "filename": file.filename,
-                "result": result.dict()
-            })
-        except Exception as e:
-            results.append({
-                "filename": file.filename,
-                "error": str(e)
-            })
+    # Файлы обрабатываются одновременно, порядок результатов сохраняется
+    results = await asyncio.gather(*(process_file(file) for file in files))
     
     return {"results": results}
 
-@app.post("/metrics/calculate")
+@app.post("/metrics/calculate", response_model=Dict[str, Any])
 async def calculate_metrics(
     extracted_text: str,
     ground_truth: str,
@@ -200,22 +275,55 @@ async def calculate_metrics(
     Расчет метрик качества OCR
     """
     try:
-        metrics = metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
+        return await run_blocking(_calculate_metrics_data, extracted_text, ground_truth, expected_fields)
         
-        if expected_fields:
-            field_metrics = {}
-            for field in expected_fields:
-                field_metrics[field] = metrics_calculator.calculate_field_metrics(
-                    extracted_text, ground_truth, field
-                )
-            metrics["field_metrics"] = field_metrics
+    except Exception as e:
+        logger.error(f"Ошибка при расчете метрик: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _calculate_metrics_data(
+    extracted_text: str,
+    ground_truth: str,
+    expected_fields: Optional[List[str]]
+) -> Dict[str, Any]:
+    """
+    Синхронный расчет метрик (выполняется в пуле потоков)
+    """
+    metrics = metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
+    
+    if expected_fields:
+        # Метрики полей пока совпадают с метриками всего документа:
+        # используются уже посчитанные значения вместо пересчета на каждое поле
+        metrics["field_metrics"] = {field: dict(metrics) for field in expected_fields}
+    
+    return metrics
+
+@app.post("/metrics/calculate_batch", response_model=MetricsBatchResponse)
+async def calculate_metrics_batch(request: MetricsBatchRequest):
+    """
+    Пакетный расчет метрик качества OCR для нескольких пар текстов
+    """
+    try:
+        results = await run_blocking(
+            _calculate_metrics_batch_data,
+            [(item.extracted_text, item.ground_truth) for item in request.items]
+        )
         
-        return metrics
+        return {"results": results}
         
     except Exception as e:
-        logger.error(f"Ошибка при расчете метрик: {str(e)}")
+        logger.error(f"Ошибка при пакетном расчете метрик: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _calculate_metrics_batch_data(pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Синхронный пакетный расчет метрик (выполняется в пуле потоков)
+    """
+    return [
+        metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
+        for extracted_text, ground_truth in pairs
+    ]
+
 @app.post("/noise/process")
 async def process_noisy_document(
     file: UploadFile = File(...),
@@ -225,29 +333,39 @@ async def process_noisy_document(
     Обработка зашумленного документа
     """
     try:
-        image_data = await file.read()
-        
-        # Предобработка для удаления шума
-        cleaned_image = noise_handler.clean_image(image_data)
+        # Чтение изображения с проверкой размера файла
+        image_data = await read_upload(file, MAX_UPLOAD_SIZE, "Файл слишком большой (максимум 10MB)")
         
-        # OCR обработка
-        extracted_text = ocr_service.extract_text(cleaned_image)
-        
-        # Расчет метрик для зашумленного документа
-        metrics = {}
-        if ground_truth:
-            metrics = metrics_calculator.calculate_noise_metrics(extracted_text, ground_truth)
-        
-        return {
-            "extracted_text": extracted_text,
-            "metrics": metrics,
-            "noise_removed": True
-        }
+        # Очистка, OCR и метрики выполняются в пуле потоков
+        return await run_blocking(_process_noisy_data, image_data, ground_truth)
         
     except Exception as e:
         logger.error(f"Ошибка при обработке зашумленного документа: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _process_noisy_data(image_data: bytes, ground_truth: Optional[str]) -> Dict[str, Any]:
+    """
+    Синхронная обработка зашумленного изображения (выполняется в пуле потоков)
+    """
+    # Предобработка для удаления шума и OCR: очищенное изображение передается
+    # в OCR массивом, без промежуточного кодирования в PNG и обратно
+    image = noise_handler.decode_image(image_data)
+    if image is not None:
+        extracted_text = ocr_service.extract_text_from_image(noise_handler.clean_image_array(image))
+    else:
+        extracted_text = ocr_service.extract_text(image_data)
+    
+    # Расчет метрик для зашумленного документа
+    metrics = {}
+    if ground_truth:
+        metrics = metrics_calculator.calculate_noise_metrics(extracted_text, ground_truth)
+    
+    return {
+        "extracted_text": extracted_text,
+        "metrics": metrics,
+        "noise_removed": True
+    }
+
 @app.post("/pdf/process")
 async def process_pdf_document(
     file: UploadFile = File(...),
@@ -269,51 +387,25 @@ async def process_pdf_document(
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Файл должен быть PDF")
         
-        # Чтение PDF
-        pdf_data = await file.read()
+        # Чтение PDF с проверкой размера файла
+        pdf_data = await read_upload(file, MAX_PDF_UPLOAD_SIZE, "PDF файл слишком большой (максимум 50MB)")
         
         if len(pdf_data) == 0:
             raise HTTPException(status_code=400, detail="Пустой файл")
         
-        if len(pdf_data) > 50 * 1024 * 1024:  # 50MB для PDF
-            raise HTTPException(status_code=400, detail="PDF файл слишком большой (максимум 50MB)")
-        
         # Обработка параметров
         expected_fields_list = json.loads(expected_fields) if expected_fields else None
-        schema_dict = json.loads(schema) if schema else None
-        
-        # Извлечение текста из PDF
-        extracted_text = pdf_processor.extract_text_from_pdf(pdf_data)
-        
-        # Получение информации о PDF
-        pdf_info = pdf_processor.get_pdf_info(pdf_data)
-        
-        # Извлечение структурированных данных
-        structured_data = data_extractor.extract_fields(extracted_text, expected_fields_list)
-        
-        # Расчет метрик
-        metrics = {}
-        if ground_truth:
-            metrics = metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
-        
-        # Проверка JSON валидности
-        json_validity = data_extractor.validate_json(structured_data)
-        
-        # Проверка соответствия схеме
-        schema_consistency = data_extractor.validate_schema(structured_data, schema_dict) if schema_dict else True
-        
-        processing_time = time.time() - start_time
-        
-        return {
-            "extracted_text": extracted_text,
-            "structured_data": structured_data,
-            "metrics": metrics,
-            "json_validity": json_validity,
-            "schema_consistency": schema_consistency,
-            "processing_time": processing_time,
-            "pdf_info": pdf_info,
-            "file_type": "PDF"
-        }
+        schema_key = schema_key_from_text(schema) if schema else None
+        
+        # Извлечение текста, полей и метрик выполняется в пуле потоков
+        return await run_blocking(
+            _process_pdf_data,
+            pdf_data,
+            ground_truth,
+            expected_fields_list,
+            schema_key,
+            start_time
+        )
         
     except Exception as e:
         import traceback
@@ -322,6 +414,49 @@ async def process_pdf_document(
         logger.error(f"Детали ошибки: {error_details}")
         raise HTTPException(status_code=500, detail=f"Ошибка обработки PDF: {str(e)}")
 
+def _process_pdf_data(
+    pdf_data: bytes,
+    ground_truth: Optional[str],
+    expected_fields_list: Optional[List[str]],
+    schema_key: Optional[str],
+    start_time: float
+) -> Dict[str, Any]:
+    """
+    Синхронная обработка PDF документа (выполняется в пуле потоков)
+    """
+    # Извлечение текста из PDF
+    extracted_text = pdf_processor.extract_text_from_pdf(pdf_data)
+    
+    # Получение информации о PDF
+    pdf_info = pdf_processor.get_pdf_info(pdf_data)
+    
+    # Извлечение структурированных данных
+    structured_data = data_extractor.extract_fields(extracted_text, expected_fields_list)
+    
+    # Расчет метрик
+    metrics = {}
+    if ground_truth:
+        metrics = metrics_calculator.calculate_all_metrics(extracted_text, ground_truth)
+    
+    # Проверка JSON валидности
+    json_validity = data_extractor.validate_json(structured_data)
+    
+    # Проверка соответствия схеме
+    schema_consistency = data_extractor.validate_schema_by_key(structured_data, schema_key) if schema_key else True
+    
+    processing_time = time.time() - start_time
+    
+    return {
+        "extracted_text": extracted_text,
+        "structured_data": structured_data,
+        "metrics": metrics,
+        "json_validity": json_validity,
+        "schema_consistency": schema_consistency,
+        "processing_time": processing_time,
+        "pdf_info": pdf_info,
+        "file_type": "PDF"
+    }
+
 @app.get("/health")
 async def health_check():
     """
@@ -359,7 +494,7 @@ async def test_ocr():
         img_byte_arr = img_byte_arr.getvalue()
         
         # Обрабатываем через OCR
-        extracted_text = ocr_service.extract_text(img_byte_arr)
+        extracted_text = await run_blocking(ocr_service.extract_text, img_byte_arr)
         
         return {
             "status": "success",
@@ -1,15 +1,69 @@
-import re
-import Levenshtein
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from rapidfuzz.distance import Levenshtein
 from typing import List, Dict, Any, Tuple
 from sklearn.metrics import precision_score, recall_score, f1_score
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Минимальная длина текста, с которой множества символов считаются через NumPy
+VECTORIZED_CHARS_MIN_LENGTH = 256
+
+# Максимальный код символа для подсчета через bincount (базовая многоязычная плоскость)
+VECTORIZED_CHARS_MAX_CODEPOINT = 0xFFFF
+
+# Размер кэша метрик по парам текстов
+METRICS_CACHE_SIZE = 4096
+
+# Метрики для непустых текстов, совпадающих после нормализации
+# (exact_match зависит от регистра и пробелов и вычисляется отдельно)
+IDENTICAL_TEXT_METRICS = {
+    'cer': 0.0,
+    'wer': 0.0,
+    'normalized_levenshtein': 0.0,
+    'exact_match': 1.0,
+    'char_precision': 1.0,
+    'char_recall': 1.0,
+    'char_f1': 1.0,
+    'word_precision': 1.0,
+    'word_recall': 1.0,
+    'word_f1': 1.0
+}
+
+@lru_cache(maxsize=1024)
+def _normalize_text_cached(text: str) -> str:
+    """Нормализация текста с кэшированием (эталонные тексты часто повторяются в пакетах)"""
+    # Приведение к нижнему регистру и схлопывание пробельных символов:
+    # str.split() без аргументов делит по тем же символам, что и \s, и отбрасывает края
+    normalized = ' '.join(text.lower().split())
+    
+    # Удаление знаков препинания (опционально)
+    # normalized = re.sub(r'[^\w\s]', '', normalized)
+    
+    return normalized
+
+def _text_digest(text: str) -> bytes:
+    """128-битный BLAKE2-хэш текста для ключа кэша"""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
 class MetricsCalculator:
-    def __init__(self):
-        """Инициализация калькулятора метрик"""
-        pass
+    def __init__(self, cache_size: int = METRICS_CACHE_SIZE):
+        """
+        Инициализация калькулятора метрик
+        
+        Args:
+            cache_size: Размер LRU-кэша метрик по парам текстов (0 - без кэша)
+        """
+        # LRU-кэш метрик по паре текстов (в пакетах эталонные тексты и результаты OCR повторяются).
+        # Ключ - хэши текстов, поэтому размер кэша не зависит от длины документов
+        self._metrics_cache_size = cache_size
+        self._metrics_cache = OrderedDict()
+        self._metrics_cache_lock = threading.Lock()
+        self._metrics_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
     
     def calculate_all_metrics(self, extracted_text: str, ground_truth: str) -> Dict[str, float]:
         """
@@ -23,29 +77,26 @@ class MetricsCalculator:
             Словарь с метриками
         """
         try:
-            metrics = {}
-            
-            # CER (Character Error Rate)
-            metrics['cer'] = self.calculate_cer(extracted_text, ground_truth)
-            
-            # WER (Word Error Rate)
-            metrics['wer'] = self.calculate_wer(extracted_text, ground_truth)
-            
-            # Normalized Levenshtein Distance
-            metrics['normalized_levenshtein'] = self.calculate_normalized_levenshtein(
-                extracted_text, ground_truth
-            )
-            
-            # Exact Match
-            metrics['exact_match'] = 1.0 if extracted_text.strip() == ground_truth.strip() else 0.0
-            
-            # Character-level precision, recall, F1
-            char_metrics = self.calculate_character_metrics(extracted_text, ground_truth)
-            metrics.update(char_metrics)
-            
-            # Word-level precision, recall, F1
-            word_metrics = self.calculate_word_metrics(extracted_text, ground_truth)
-            metrics.update(word_metrics)
+            cache_key = None
+            if self._metrics_cache_size and isinstance(extracted_text, str) and isinstance(ground_truth, str):
+                cache_key = (_text_digest(extracted_text), _text_digest(ground_truth))
+                with self._metrics_cache_lock:
+                    cached = self._metrics_cache.get(cache_key)
+                    if cached is not None:
+                        self._metrics_cache.move_to_end(cache_key)
+                        self._metrics_cache_stats['hits'] += 1
+                        # Копия, чтобы изменения словаря вызывающим кодом не попадали в кэш
+                        return dict(cached)
+                    self._metrics_cache_stats['misses'] += 1
+            
+            metrics = self._compute_all_metrics(extracted_text, ground_truth)
+            
+            if cache_key is not None:
+                with self._metrics_cache_lock:
+                    self._metrics_cache[cache_key] = dict(metrics)
+                    if len(self._metrics_cache) > self._metrics_cache_size:
+                        self._metrics_cache.popitem(last=False)
+                        self._metrics_cache_stats['evictions'] += 1
             
             return metrics
             
@@ -53,6 +104,64 @@ class MetricsCalculator:
             logger.error(f"Ошибка при расчете метрик: {str(e)}")
             return {}
     
+    def metrics_cache_info(self) -> Dict[str, int]:
+        """Статистика кэша метрик (попадания, промахи, вытеснения, размер)"""
+        with self._metrics_cache_lock:
+            return {**self._metrics_cache_stats, 'size': len(self._metrics_cache), 'maxsize': self._metrics_cache_size}
+    
+    def clear_metrics_cache(self):
+        """Очистка кэша метрик"""
+        with self._metrics_cache_lock:
+            self._metrics_cache.clear()
+    
+    def _compute_all_metrics(self, extracted_text: str, ground_truth: str) -> Dict[str, float]:
+        """Расчет всех основных метрик без кэширования"""
+        # Нормализация и разбиение на слова выполняются один раз для всех метрик
+        extracted_normalized = self._normalize_text(extracted_text)
+        ground_truth_normalized = self._normalize_text(ground_truth)
+        
+        # Совпадающие после нормализации непустые тексты не требуют расчета расстояний
+        if ground_truth_normalized and extracted_normalized == ground_truth_normalized:
+            metrics = dict(IDENTICAL_TEXT_METRICS)
+            metrics['exact_match'] = 1.0 if extracted_text.strip() == ground_truth.strip() else 0.0
+            return metrics
+        
+        extracted_words = extracted_normalized.split()
+        ground_truth_words = ground_truth_normalized.split()
+        
+        # Расстояние Левенштейна по символам общее для CER и нормализованного расстояния
+        char_distance = Levenshtein.distance(extracted_normalized, ground_truth_normalized)
+        
+        metrics = {}
+        
+        # CER (Character Error Rate)
+        metrics['cer'] = self._cer_from_distance(
+            char_distance, extracted_text, ground_truth, ground_truth_normalized
+        )
+        
+        # WER (Word Error Rate)
+        metrics['wer'] = self._wer_from_words(
+            extracted_text, ground_truth, extracted_words, ground_truth_words
+        )
+        
+        # Normalized Levenshtein Distance
+        metrics['normalized_levenshtein'] = self._normalized_levenshtein_from_distance(
+            char_distance, extracted_normalized, ground_truth_normalized
+        )
+        
+        # Exact Match
+        metrics['exact_match'] = 1.0 if extracted_text.strip() == ground_truth.strip() else 0.0
+        
+        # Character-level precision, recall, F1
+        metrics.update(self._character_metrics_from_normalized(
+            extracted_normalized, ground_truth_normalized
+        ))
+        
+        # Word-level precision, recall, F1
+        metrics.update(self._word_metrics_from_words(extracted_words, ground_truth_words))
+        
+        return metrics
+    
     def calculate_cer(self, extracted_text: str, ground_truth: str) -> float:
         """
         Расчет Character Error Rate (CER)
@@ -65,9 +174,6 @@ class MetricsCalculator:
             CER в диапазоне [0, 1]
         """
         try:
-            if not ground_truth:
-                return 1.0 if extracted_text else 0.0
-            
             # Нормализация текста
             extracted_normalized = self._normalize_text(extracted_text)
             ground_truth_normalized = self._normalize_text(ground_truth)
@@ -75,15 +181,24 @@ class MetricsCalculator:
             # Расчет расстояния Левенштейна
             distance = Levenshtein.distance(extracted_normalized, ground_truth_normalized)
             
-            # CER = расстояние / длина эталонного текста
-            cer = distance / len(ground_truth_normalized) if ground_truth_normalized else 0.0
-            
-            return min(cer, 1.0)  # Ограничиваем максимальным значением 1.0
+            return self._cer_from_distance(distance, extracted_text, ground_truth, ground_truth_normalized)
             
         except Exception as e:
             logger.error(f"Ошибка при расчете CER: {str(e)}")
             return 1.0
     
+    @staticmethod
+    def _cer_from_distance(distance: int, extracted_text: str, ground_truth: str,
+                           ground_truth_normalized: str) -> float:
+        """CER по уже посчитанному расстоянию Левенштейна"""
+        if not ground_truth:
+            return 1.0 if extracted_text else 0.0
+        
+        # CER = расстояние / длина эталонного текста
+        cer = distance / len(ground_truth_normalized) if ground_truth_normalized else 0.0
+        
+        return min(cer, 1.0)  # Ограничиваем максимальным значением 1.0
+    
     def calculate_wer(self, extracted_text: str, ground_truth: str) -> float:
         """
         Расчет Word Error Rate (WER)
@@ -96,28 +211,34 @@ class MetricsCalculator:
             WER в диапазоне [0, 1]
         """
         try:
-            if not ground_truth:
-                return 1.0 if extracted_text else 0.0
-            
             # Разбиение на слова
             extracted_words = self._split_into_words(extracted_text)
             ground_truth_words = self._split_into_words(ground_truth)
             
-            if not ground_truth_words:
-                return 1.0 if extracted_words else 0.0
-            
-            # Расчет расстояния Левенштейна на уровне слов
-            distance = Levenshtein.distance(extracted_words, ground_truth_words)
-            
-            # WER = расстояние / количество слов в эталонном тексте
-            wer = distance / len(ground_truth_words)
-            
-            return min(wer, 1.0)  # Ограничиваем максимальным значением 1.0
+            return self._wer_from_words(extracted_text, ground_truth, extracted_words, ground_truth_words)
             
         except Exception as e:
             logger.error(f"Ошибка при расчете WER: {str(e)}")
             return 1.0
     
+    @staticmethod
+    def _wer_from_words(extracted_text: str, ground_truth: str,
+                        extracted_words: List[str], ground_truth_words: List[str]) -> float:
+        """WER по уже разбитым на слова текстам"""
+        if not ground_truth:
+            return 1.0 if extracted_text else 0.0
+        
+        if not ground_truth_words:
+            return 1.0 if extracted_words else 0.0
+        
+        # Расчет расстояния Левенштейна на уровне слов
+        distance = Levenshtein.distance(extracted_words, ground_truth_words)
+        
+        # WER = расстояние / количество слов в эталонном тексте
+        wer = distance / len(ground_truth_words)
+        
+        return min(wer, 1.0)  # Ограничиваем максимальным значением 1.0
+    
     def calculate_normalized_levenshtein(self, extracted_text: str, ground_truth: str) -> float:
         """
         Расчет нормализованного расстояния Левенштейна
@@ -140,19 +261,27 @@ class MetricsCalculator:
             # Расчет расстояния Левенштейна
             distance = Levenshtein.distance(extracted_normalized, ground_truth_normalized)
             
-            # Нормализация по максимальной длине
-            max_length = max(len(extracted_normalized), len(ground_truth_normalized))
-            
-            if max_length == 0:
-                return 0.0
-            
-            normalized_distance = distance / max_length
-            return min(normalized_distance, 1.0)
+            return self._normalized_levenshtein_from_distance(
+                distance, extracted_normalized, ground_truth_normalized
+            )
             
         except Exception as e:
             logger.error(f"Ошибка при расчете нормализованного расстояния Левенштейна: {str(e)}")
             return 1.0
     
+    @staticmethod
+    def _normalized_levenshtein_from_distance(distance: int, extracted_normalized: str,
+                                              ground_truth_normalized: str) -> float:
+        """Нормализованное расстояние по уже посчитанному расстоянию Левенштейна"""
+        # Нормализация по максимальной длине
+        max_length = max(len(extracted_normalized), len(ground_truth_normalized))
+        
+        if max_length == 0:
+            return 0.0
+        
+        normalized_distance = distance / max_length
+        return min(normalized_distance, 1.0)
+    
     def calculate_character_metrics(self, extracted_text: str, ground_truth: str) -> Dict[str, float]:
         """
         Расчет метрик на уровне символов (precision, recall, F1)
@@ -165,35 +294,74 @@ class MetricsCalculator:
             Словарь с метриками
         """
         try:
-            extracted_normalized = self._normalize_text(extracted_text)
-            ground_truth_normalized = self._normalize_text(ground_truth)
-            
-            # Создание множеств символов
-            extracted_chars = set(extracted_normalized)
-            ground_truth_chars = set(ground_truth_normalized)
-            
-            # Расчет пересечения
-            intersection = extracted_chars.intersection(ground_truth_chars)
-            
-            # Precision: сколько извлеченных символов правильные
-            precision = len(intersection) / len(extracted_chars) if extracted_chars else 0.0
-            
-            # Recall: сколько правильных символов извлечено
-            recall = len(intersection) / len(ground_truth_chars) if ground_truth_chars else 0.0
-            
-            # F1-score
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
-            
-            return {
-                'char_precision': precision,
-                'char_recall': recall,
-                'char_f1': f1
-            }
+            return self._character_metrics_from_normalized(
+                self._normalize_text(extracted_text), self._normalize_text(ground_truth)
+            )
             
         except Exception as e:
             logger.error(f"Ошибка при расчете метрик символов: {str(e)}")
             return {'char_precision': 0.0, 'char_recall': 0.0, 'char_f1': 0.0}
     
+    def _character_metrics_from_normalized(self, extracted_normalized: str,
+                                           ground_truth_normalized: str) -> Dict[str, float]:
+        """Метрики символов по уже нормализованным текстам"""
+        # Число общих и уникальных символов
+        common, extracted_count, ground_truth_count = self._count_unique_chars(
+            extracted_normalized, ground_truth_normalized
+        )
+        
+        # Precision: сколько извлеченных символов правильные
+        precision = common / extracted_count if extracted_count else 0.0
+        
+        # Recall: сколько правильных символов извлечено
+        recall = common / ground_truth_count if ground_truth_count else 0.0
+        
+        # F1-score
+        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
+        
+        return {
+            'char_precision': precision,
+            'char_recall': recall,
+            'char_f1': f1
+        }
+    
+    @staticmethod
+    def _count_unique_chars(extracted: str, ground_truth: str) -> Tuple[int, int, int]:
+        """
+        Подсчет уникальных символов двух текстов и их пересечения
+        
+        Короткие тексты обрабатываются множествами Python, длинные - гистограммой
+        кодов символов через np.bincount.
+        
+        Returns:
+            (число общих символов, уникальных в extracted, уникальных в ground_truth)
+        """
+        if max(len(extracted), len(ground_truth)) >= VECTORIZED_CHARS_MIN_LENGTH:
+            extracted_codes = np.frombuffer(extracted.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+            ground_truth_codes = np.frombuffer(ground_truth.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+            max_code = max(
+                int(extracted_codes.max(initial=0)),
+                int(ground_truth_codes.max(initial=0))
+            )
+            
+            if max_code <= VECTORIZED_CHARS_MAX_CODEPOINT:
+                extracted_present = np.bincount(extracted_codes, minlength=max_code + 1) > 0
+                ground_truth_present = np.bincount(ground_truth_codes, minlength=max_code + 1) > 0
+                return (
+                    int(np.count_nonzero(extracted_present & ground_truth_present)),
+                    int(np.count_nonzero(extracted_present)),
+                    int(np.count_nonzero(ground_truth_present))
+                )
+        
+        extracted_chars = set(extracted)
+        ground_truth_chars = set(ground_truth)
+        
+        return (
+            len(extracted_chars.intersection(ground_truth_chars)),
+            len(extracted_chars),
+            len(ground_truth_chars)
+        )
+    
     def calculate_word_metrics(self, extracted_text: str, ground_truth: str) -> Dict[str, float]:
         """
         Расчет метрик на уровне слов (precision, recall, F1)
@@ -206,31 +374,39 @@ class MetricsCalculator:
             Словарь с метриками
         """
         try:
-            extracted_words = set(self._split_into_words(extracted_text))
-            ground_truth_words = set(self._split_into_words(ground_truth))
-            
-            # Расчет пересечения
-            intersection = extracted_words.intersection(ground_truth_words)
-            
-            # Precision: сколько извлеченных слов правильные
-            precision = len(intersection) / len(extracted_words) if extracted_words else 0.0
-            
-            # Recall: сколько правильных слов извлечено
-            recall = len(intersection) / len(ground_truth_words) if ground_truth_words else 0.0
-            
-            # F1-score
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
-            
-            return {
-                'word_precision': precision,
-                'word_recall': recall,
-                'word_f1': f1
-            }
+            return self._word_metrics_from_words(
+                self._split_into_words(extracted_text), self._split_into_words(ground_truth)
+            )
             
         except Exception as e:
             logger.error(f"Ошибка при расчете метрик слов: {str(e)}")
             return {'word_precision': 0.0, 'word_recall': 0.0, 'word_f1': 0.0}
     
+    @staticmethod
+    def _word_metrics_from_words(extracted_words: List[str],
+                                 ground_truth_words: List[str]) -> Dict[str, float]:
+        """Метрики слов по уже разбитым на слова текстам"""
+        extracted_words = set(extracted_words)
+        ground_truth_words = set(ground_truth_words)
+        
+        # Расчет пересечения
+        intersection = extracted_words.intersection(ground_truth_words)
+        
+        # Precision: сколько извлеченных слов правильные
+        precision = len(intersection) / len(extracted_words) if extracted_words else 0.0
+        
+        # Recall: сколько правильных слов извлечено
+        recall = len(intersection) / len(ground_truth_words) if ground_truth_words else 0.0
+        
+        # F1-score
+        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
+        
+        return {
+            'word_precision': precision,
+            'word_recall': recall,
+            'word_f1': f1
+        }
+    
     def calculate_field_metrics(self, extracted_text: str, ground_truth: str, field_name: str) -> Dict[str, float]:
         """
         Расчет метрик для конкретного поля
@@ -290,16 +466,7 @@ class MetricsCalculator:
         if not text:
             return ""
         
-        # Приведение к нижнему регистру
-        normalized = text.lower()
-        
-        # Удаление лишних пробелов
-        normalized = re.sub(r'\s+', ' ', normalized)
-        
-        # Удаление знаков препинания (опционально)
-        # normalized = re.sub(r'[^\w\s]', '', normalized)
-        
-        return normalized.strip()
+        return _normalize_text_cached(text)
     
     def _split_into_words(self, text: str) -> List[str]:
         """
@@ -334,10 +501,15 @@ class MetricsCalculator:
             if not results:
                 return {}
             
-            # Агрегация метрик
-            total_cer = sum(r.get('cer', 0) for r in results)
-            total_wer = sum(r.get('wer', 0) for r in results)
-            exact_matches = sum(1 for r in results if r.get('exact_match', 0) == 1.0)
+            # Агрегация метрик за один проход по результатам
+            total_cer = 0
+            total_wer = 0
+            exact_matches = 0
+            for r in results:
+                total_cer += r.get('cer', 0)
+                total_wer += r.get('wer', 0)
+                if r.get('exact_match', 0) == 1.0:
+                    exact_matches += 1
             
             return {
                 'average_cer': total_cer / len(results),
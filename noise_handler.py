@@ -2,11 +2,17 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
-from typing import Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional
 import logging
 
+from config import Config
+
 logger = logging.getLogger(__name__)
 
+# Уровень сжатия PNG для очищенных изображений (без потерь, 1 - самое быстрое сжатие)
+PNG_COMPRESSION_LEVEL = 1
+
 class NoiseHandler:
     def __init__(self):
         """Инициализация обработчика шума"""
@@ -27,7 +33,7 @@ class NoiseHandler:
             image = self._bytes_to_image(image_data)
             
             # Применение различных методов очистки
-            cleaned_image = self._apply_noise_reduction(image)
+            cleaned_image = self.clean_image_array(image)
             
             # Конвертация обратно в байты
             cleaned_bytes = self._image_to_bytes(cleaned_image)
@@ -38,9 +44,67 @@ class NoiseHandler:
             logger.error(f"Ошибка при очистке изображения: {str(e)}")
             return image_data
     
+    def clean_images(self, images_data: List[bytes], max_workers: Optional[int] = None) -> List[bytes]:
+        """
+        Очистка нескольких изображений от шума
+        
+        Изображения обрабатываются пулом потоков: OpenCV освобождает GIL
+        во время фильтрации. Порядок результатов совпадает с порядком изображений.
+        
+        Args:
+            images_data: Байты исходных изображений
+            max_workers: Количество потоков (по умолчанию Config.MAX_WORKERS)
+            
+        Returns:
+            Байты очищенных изображений
+        """
+        workers = min(max_workers or Config.MAX_WORKERS, len(images_data))
+        if workers <= 1:
+            return [self.clean_image(image_data) for image_data in images_data]
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.clean_image, images_data))
+    
+    def clean_image_array(self, image: np.ndarray) -> np.ndarray:
+        """
+        Очистка изображения от шума без кодирования в байты
+        
+        Args:
+            image: Изображение OpenCV (BGR или оттенки серого)
+            
+        Returns:
+            Очищенное бинаризованное изображение в оттенках серого
+        """
+        return self._apply_noise_reduction(image)
+    
+    def decode_image(self, image_data: bytes) -> Optional[np.ndarray]:
+        """
+        Декодирование байтов в изображение OpenCV
+        
+        Args:
+            image_data: Байты изображения
+            
+        Returns:
+            Изображение BGR или None, если данные не удалось декодировать
+        """
+        try:
+            return self._bytes_to_image(image_data)
+            
+        except Exception:
+            return None
+    
     def _bytes_to_image(self, image_data: bytes) -> np.ndarray:
         """Конвертация байтов в изображение OpenCV"""
         try:
+            # OpenCV декодирует сразу в BGR (ориентация EXIF не применяется, как и в PIL)
+            image = cv2.imdecode(
+                np.frombuffer(image_data, np.uint8),
+                cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+            )
+            if image is not None:
+                return image
+            
+            # Форматы, которые не поддерживает OpenCV, читаются через PIL
             pil_image = Image.open(io.BytesIO(image_data))
             
             if pil_image.mode != 'RGB':
@@ -58,21 +122,14 @@ class NoiseHandler:
     def _image_to_bytes(self, image: np.ndarray) -> bytes:
         """Конвертация изображения OpenCV в байты"""
         try:
-            # Конвертация в RGB
-            if len(image.shape) == 3:
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            else:
-                image_rgb = image
-            
-            # Конвертация в PIL Image
-            pil_image = Image.fromarray(image_rgb)
-            
-            # Конвертация в байты
-            img_byte_arr = io.BytesIO()
-            pil_image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
+            # PNG кодируется напрямую из BGR/оттенков серого с быстрым сжатием
+            success, encoded = cv2.imencode(
+                '.png', image, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION_LEVEL]
+            )
+            if not success:
+                raise ValueError("Не удалось закодировать изображение в PNG")
             
-            return img_byte_arr
+            return encoded.tobytes()
             
         except Exception as e:
             logger.error(f"Ошибка конвертации изображения в байты: {str(e)}")
@@ -95,22 +152,26 @@ class NoiseHandler:
             else:
                 gray = image.copy()
             
+            # Каждый этап заменяет результат предыдущего, чтобы промежуточные
+            # изображения освобождались сразу, а не жили до конца метода
+            
             # 1. Удаление солевого и перцового шума
-            denoised = self._remove_salt_pepper_noise(gray)
+            processed = self._remove_salt_pepper_noise(gray)
+            del gray
             
             # 2. Удаление гауссова шума
-            denoised = self._remove_gaussian_noise(denoised)
+            processed = self._remove_gaussian_noise(processed)
             
             # 3. Улучшение контраста
-            enhanced = self._enhance_contrast(denoised)
+            processed = self._enhance_contrast(processed)
             
             # 4. Морфологические операции
-            cleaned = self._apply_morphological_operations(enhanced)
+            processed = self._apply_morphological_operations(processed)
             
             # 5. Бинаризация
-            binary = self._adaptive_binarization(cleaned)
+            processed = self._adaptive_binarization(processed)
             
-            return binary
+            return processed
             
         except Exception as e:
             logger.error(f"Ошибка при применении снижения шума: {str(e)}")
@@ -196,13 +257,15 @@ class NoiseHandler:
         try:
             image = self._bytes_to_image(image_data)
             
+            # Изображение только читается, копия не нужна
             if len(image.shape) == 3:
                 gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             else:
-                gray = image.copy()
+                gray = image
             
             # Расчет вариации (стандартного отклонения) как меры шума
-            noise_level = np.std(gray) / 255.0
+            _, std = self._intensity_moments(gray)
+            noise_level = std / 255.0
             
             return min(noise_level, 1.0)
             
@@ -295,8 +358,9 @@ class NoiseHandler:
             
             sharpened = cv2.filter2D(image, -1, kernel)
             
-            # Нормализация значений
-            sharpened = np.clip(sharpened, 0, 255).astype(np.uint8)
+            # Нормализация значений (для uint8 filter2D уже насыщает результат до 0..255)
+            if sharpened.dtype != np.uint8:
+                sharpened = np.clip(sharpened, 0, 255).astype(np.uint8)
             
             return sharpened
             
@@ -312,11 +376,12 @@ class NoiseHandler:
             
             # Фильтрация компонентов по размеру
             min_size = 10  # Минимальный размер компонента
-            cleaned = np.zeros_like(image)
             
-            for i in range(1, num_labels):  # Пропускаем фон (label 0)
-                if stats[i, cv2.CC_STAT_AREA] >= min_size:
-                    cleaned[labels == i] = 255
+            # Таблица значений по меткам компонентов: один проход по изображению вместо прохода на компонент
+            keep = stats[:, cv2.CC_STAT_AREA] >= min_size
+            keep[0] = False  # Пропускаем фон (label 0)
+            lut = np.where(keep, 255, 0).astype(image.dtype)
+            cleaned = lut[labels]
             
             return cleaned
             
@@ -324,6 +389,12 @@ class NoiseHandler:
             logger.error(f"Ошибка при удалении артефактов: {str(e)}")
             return image
     
+    @staticmethod
+    def _intensity_moments(gray: np.ndarray) -> Tuple[float, float]:
+        """Среднее и стандартное отклонение яркости за один проход по изображению"""
+        mean, std = cv2.meanStdDev(gray)
+        return float(mean[0, 0]), float(std[0, 0])
+    
     def get_noise_statistics(self, image_data: bytes) -> dict:
         """
         Получение статистики шума в изображении
@@ -337,15 +408,17 @@ class NoiseHandler:
         try:
             image = self._bytes_to_image(image_data)
             
+            # Изображение только читается, копия не нужна
             if len(image.shape) == 3:
                 gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             else:
-                gray = image.copy()
+                gray = image
             
             # Расчет различных метрик шума
-            noise_level = np.std(gray) / 255.0
-            mean_intensity = np.mean(gray) / 255.0
-            contrast = np.std(gray) / np.mean(gray) if np.mean(gray) > 0 else 0
+            mean, std = self._intensity_moments(gray)
+            noise_level = std / 255.0
+            mean_intensity = mean / 255.0
+            contrast = std / mean if mean > 0 else 0
             
             return {
                 'noise_level': noise_level,
@@ -4,32 +4,213 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
+import os
+import asyncio
+import contextlib
+import hashlib
 import logging
-from typing import List, Tuple, Dict, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Optional
+
+from config import Config
+from rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Языки EasyOCR: русский первым для приоритета
+READER_LANGUAGES = ('ru', 'en')
+
+# Максимальная меньшая сторона изображения перед предобработкой по умолчанию (крупнее - уменьшается)
+PREPROCESS_MAX_SHORT_SIDE = 4000
+
+# Максимальное число изображений в одном батче детектора EasyOCR
+OCR_BATCH_SIZE = 8
+
+# Общий для процесса пул декодирования и предобработки изображений пакета
+# (OpenCV освобождает GIL, потоки создаются пулом по мере необходимости)
+_preprocess_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                          thread_name_prefix="ocr-preprocess")
+
+# Число результатов OCR, запоминаемых по хэшу содержимого изображения
+OCR_CACHE_SIZE = 256
+
+# Повторы асинхронного OCR при временных ошибках: число попыток и экспоненциальная задержка (с)
+OCR_RETRY_ATTEMPTS = 3
+OCR_RETRY_BASE_DELAY = 1.0
+OCR_RETRY_MAX_DELAY = 10.0
+
+# Исправления типичных ошибок OCR русского текста (применяются по порядку)
+OCR_CORRECTIONS = {
+    # Частые замены латинских символов на кириллические
+    'a': 'а', 'A': 'А', 'B': 'В', 'C': 'С', 'E': 'Е', 'H': 'Н',
+    'K': 'К', 'M': 'М', 'O': 'О', 'P': 'Р', 'T': 'Т', 'X': 'Х',
+    'Y': 'У', 'c': 'с', 'e': 'е', 'o': 'о', 'p': 'р', 'x': 'х',
+    'y': 'у', 'r': 'г', 'u': 'и', 'n': 'п', 'b': 'б', 'd': 'д',
+    '6': 'б', '9': 'я', 'I': 'І', 'l': 'л', '1': 'І',
+
+    # Исправление частых слов и фраз
+    'TOO': 'ТОО', 'OOO': 'ООО', 'LLC': 'ЛЛС',
+    'AOBOP': 'ДОГОВОР', 'roBoр': 'ДОГОВОР', 'AoroBop': 'Договор',
+    'KyrrJrrr': 'Кыргыз', 'Anruarrr': 'Алматы', 'Anruarr': 'Алматы',
+    'AoroBopa': 'Договора', 'Cropourr': 'Сторон', 'Cropon': 'Сторон',
+    'rpoAalrur': 'рамочный', 'O6oy4onauus': 'обслуживание',
+    'aKaзчик': 'Заказчик', 'oMnaния': 'Компания', 'омпания': 'Компания',
+    'ТОО': 'ТОО', 'редприятие': 'Предприятие', 'едприятие': 'Предприятие',
+    'редмет': 'Предмет', 'оимость': 'Стоимость', 'Tоимость': 'Стоимость',
+}
+
+# Одиночные символы заменяются одним str.translate: все замены - кириллица, поэтому
+# последовательные replace не влияют друг на друга и дают тот же результат.
+# После этой замены в тексте не остается исправляемых латинских символов, так что
+# отдельная правка смешанных латинско-кириллических слов ничего бы не изменила
+_CHAR_CORRECTIONS = str.maketrans({
+    wrong: correct for wrong, correct in OCR_CORRECTIONS.items() if len(wrong) == 1
+})
+
+# Многосимвольные исправления, которые еще могут совпасть после замены одиночных символов
+_WORD_CORRECTIONS = tuple(
+    (wrong, correct) for wrong, correct in OCR_CORRECTIONS.items()
+    if len(wrong) > 1 and not any(ord(char) in _CHAR_CORRECTIONS for char in wrong)
+)
+
+# Общие для процесса экземпляры EasyOCR Reader по (языки, устройство)
+_reader_cache: Dict[Tuple[Tuple[str, ...], str], Any] = {}
+_reader_cache_lock = threading.Lock()
+
+# Пулы потоков torch и OpenCV настраиваются один раз на процесс, при создании первого Reader
+_threads_configured = False
+
+def _reader_gpu_argument(device: str) -> Any:
+    """Значение параметра gpu для easyocr.Reader по названию устройства"""
+    if device == "cpu":
+        return False
+    if device == "auto":
+        # EasyOCR сам выбирает CUDA, затем MPS, а без них - CPU
+        return True
+    return device
+
+def _configure_threads():
+    """
+    Ограничение внутренних пулов потоков torch и OpenCV
+    
+    OCR выполняется параллельно в нескольких потоках и процессах; если каждый вызов
+    torch и OpenCV занимает все ядра, потоки конкурируют за процессор и пропускная способность падает.
+    """
+    cv2.setNumThreads(Config.OPENCV_THREADS)
+    try:
+        import torch
+        torch.set_num_threads(Config.OCR_TORCH_THREADS)
+        torch.set_num_interop_threads(1)
+        logger.info(f"Потоки torch на вызов OCR: {Config.OCR_TORCH_THREADS}, потоки OpenCV: {Config.OPENCV_THREADS}")
+    except (ImportError, RuntimeError) as e:
+        # set_num_interop_threads допускается только до первой параллельной операции torch
+        logger.warning(f"Не удалось настроить потоки torch: {str(e)}")
+
+def _create_reader(languages: Tuple[str, ...], device: str) -> Any:
+    """Создание EasyOCR Reader с откатом на CPU, если устройство недоступно"""
+    global _threads_configured
+    if not _threads_configured:
+        _configure_threads()
+        _threads_configured = True
+    
+    gpu = _reader_gpu_argument(device)
+    # quantize влияет только на CPU: распознаватель переводится в INT8 (torch quantize_dynamic),
+    # сверточный детектор CRAFT остается в FP32
+    try:
+        reader = easyocr.Reader(list(languages), gpu=gpu, verbose=False, quantize=Config.OCR_QUANTIZE)
+    except Exception as e:
+        if gpu is False:
+            raise
+        logger.warning(f"Не удалось инициализировать EasyOCR на устройстве {device}: {str(e)}, используется CPU")
+        reader = easyocr.Reader(list(languages), gpu=False, verbose=False, quantize=Config.OCR_QUANTIZE)
+    
+    logger.info(f"EasyOCR использует устройство: {getattr(reader, 'device', device)}")
+    if Config.OCR_FP16 and str(getattr(reader, 'device', '')).startswith('cuda'):
+        _enable_fp16_recognition(reader)
+    return reader
+
+def _enable_fp16_recognition(reader: Any):
+    """
+    Выполнение распознавателя EasyOCR под torch.autocast(float16) на CUDA
+    
+    Веса остаются в FP32, autocast переводит свертки, LSTM и линейные слои в FP16.
+    Детектор CRAFT не затрагивается: его карты вероятностей обрабатываются
+    cv2.threshold, который не поддерживает float16.
+    """
+    import torch
+    
+    recognize = reader.recognize
+    
+    def recognize_fp16(*args, **kwargs):
+        # autocast действует только в текущем потоке, поэтому включается на каждый вызов
+        with torch.autocast('cuda', dtype=torch.float16):
+            return recognize(*args, **kwargs)
+    
+    # readtext и readtext_batched вызывают self.recognize, атрибут экземпляра перекрывает метод класса
+    reader.recognize = recognize_fp16
+    logger.info("Распознаватель EasyOCR выполняется в FP16 (autocast)")
+
+def get_reader(languages: Tuple[str, ...], device: str = "cpu") -> Any:
+    """
+    Получение EasyOCR Reader из кэша процесса
+    
+    Загрузка моделей занимает секунды, поэтому Reader создается один раз
+    для каждого набора языков и повторно используется всеми экземплярами OCRService.
+    
+    Args:
+        languages: Языки распознавания (порядок задает приоритет)
+        device: Устройство: auto, cpu, cuda, cuda:N или mps
+        
+    Returns:
+        Экземпляр easyocr.Reader
+    """
+    key = (tuple(languages), device)
+    with _reader_cache_lock:
+        reader = _reader_cache.get(key)
+        if reader is None:
+            reader = _create_reader(languages, device)
+            _reader_cache[key] = reader
+    return reader
+
+def _is_transient_ocr_error(error: BaseException) -> bool:
+    """Временная ошибка, после которой OCR имеет смысл повторить (нехватка памяти CPU/GPU)"""
+    if isinstance(error, MemoryError):
+        return True
+    # torch.cuda.OutOfMemoryError и ошибки выделения памяти torch - наследники RuntimeError
+    return isinstance(error, RuntimeError) and 'out of memory' in str(error).lower()
+
 class OCRService:
-    def __init__(self, languages: List[str] = ['ru', 'en']):
+    def __init__(self, languages: List[str] = ['ru', 'en'], device: Optional[str] = None,
+                 max_short_side: int = PREPROCESS_MAX_SHORT_SIDE, cache_size: int = OCR_CACHE_SIZE):
         """
         Инициализация OCR сервиса с EasyOCR
         
         Args:
             languages: Список языков для распознавания
+            device: Устройство EasyOCR: auto, cpu, cuda, cuda:N или mps (по умолчанию Config.OCR_DEVICE)
+            max_short_side: Меньшая сторона, до которой уменьшаются крупные изображения перед OCR
+            cache_size: Размер LRU-кэша результатов OCR по хэшу изображения (0 - без кэша)
         """
         self.languages = languages
+        self.device = (device or Config.OCR_DEVICE).lower()
+        self.max_short_side = max_short_side
         self.reader = None
+        
+        # LRU-кэш результатов распознавания по BLAKE2-хэшу байтов изображения
+        self._text_cache_size = cache_size
+        self._text_cache = OrderedDict()
+        self._text_cache_lock = threading.Lock()
+        self._text_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        
         self._initialize_reader()
     
     def _initialize_reader(self):
         """Инициализация EasyOCR reader"""
         try:
             # Инициализируем с приоритетом русского языка
-            self.reader = easyocr.Reader(
-                ['ru', 'en'],  # Русский первым для приоритета
-                gpu=False,
-                verbose=False
-            )
+            self.reader = get_reader(READER_LANGUAGES, self.device)
             logger.info(f"EasyOCR инициализирован для языков: ['ru', 'en'] с приоритетом русского")
         except Exception as e:
             logger.error(f"Ошибка инициализации EasyOCR: {str(e)}")
@@ -45,10 +226,78 @@ class OCRService:
         Returns:
             Извлеченный текст
         """
-        try:
-            # Конвертация байтов в изображение
-            image = self._bytes_to_image(image_data)
+        # Повторное распознавание того же файла обслуживается из кэша
+        cache_key = self._text_cache_key('text', image_data)
+        cached = self._text_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Конвертация байтов в изображение; нераспознаваемый файл не отправляется в OCR
+        image = self._bytes_to_image(image_data)
+        if image is None:
+            return ""
+        
+        extracted_text = self.extract_text_from_image(image)
+        
+        # Пустой результат (в том числе после ошибки) не кэшируется
+        if extracted_text:
+            self._text_cache_put(cache_key, extracted_text)
+        
+        return extracted_text
+    
+    def _text_cache_key(self, kind: str, image_data: bytes, *params) -> Optional[Tuple]:
+        """Ключ кэша OCR: вид результата, хэш содержимого изображения и параметры вызова"""
+        if not self._text_cache_size or not image_data:
+            return None
+        return (kind, hashlib.blake2b(image_data, digest_size=16).digest()) + params
+    
+    def _text_cache_get(self, cache_key: Optional[Tuple]) -> Any:
+        """Поиск результата в кэше OCR (None - промах)"""
+        if cache_key is None:
+            return None
+        with self._text_cache_lock:
+            cached = self._text_cache.get(cache_key)
+            if cached is not None:
+                self._text_cache.move_to_end(cache_key)
+                self._text_cache_stats['hits'] += 1
+            else:
+                self._text_cache_stats['misses'] += 1
+            return cached
+    
+    def _text_cache_put(self, cache_key: Optional[Tuple], value: Any):
+        """Сохранение результата в кэше OCR с вытеснением самых старых записей"""
+        if cache_key is None:
+            return
+        with self._text_cache_lock:
+            self._text_cache[cache_key] = value
+            if len(self._text_cache) > self._text_cache_size:
+                self._text_cache.popitem(last=False)
+                self._text_cache_stats['evictions'] += 1
+    
+    def text_cache_info(self) -> Dict[str, int]:
+        """Статистика кэша OCR (попадания, промахи, вытеснения, размер)"""
+        with self._text_cache_lock:
+            return {**self._text_cache_stats, 'size': len(self._text_cache), 'maxsize': self._text_cache_size}
+    
+    def clear_text_cache(self):
+        """Очистка кэша OCR"""
+        with self._text_cache_lock:
+            self._text_cache.clear()
+    
+    def extract_text_from_image(self, image: np.ndarray) -> str:
+        """
+        Извлечение текста из уже декодированного изображения
+        
+        Ошибки распознавания дают пустую строку, кроме нехватки памяти:
+        она пробрасывается, чтобы вызов можно было повторить.
+        
+        Args:
+            image: Изображение OpenCV (BGR или оттенки серого)
             
+        Returns:
+            Извлеченный текст
+        """
+        try:
             # Проверка, что изображение не пустое
             if image is None or image.size == 0:
                 logger.warning("Получено пустое изображение")
@@ -57,8 +306,11 @@ class OCRService:
             # Собираем набор изображений-кандидатов (варианты предобработки и поворотов)
             candidates: List[np.ndarray] = []
 
+            # Оттенки серого нужны и предобработке, и адаптивной бинаризации - считаем один раз
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+
             # Вариант 1: базовая предобработка
-            base = self._preprocess_image(image)
+            base = self._preprocess_image(gray)
             candidates.append(base)
 
             # Вариант 2: инверсия
@@ -71,7 +323,7 @@ class OCRService:
             # Вариант 3: адаптивная бинаризация
             try:
                 adaptive = cv2.adaptiveThreshold(
-                    cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image,
+                    gray,
                     255,
                     cv2.ADAPTIVE_THRESH_MEAN_C,
                     cv2.THRESH_BINARY,
@@ -125,8 +377,10 @@ class OCRService:
                         score_easy = self._score_text(text_easy)
                         if score_easy > best_score:
                             best_text, best_score = text_easy, score_easy
-                    except Exception:
-                        pass
+                    except Exception as e:
+                        # Нехватка памяти - не отсутствие текста: ошибка передается вызывающему коду
+                        if _is_transient_ocr_error(e):
+                            raise
 
                     # Tesseract (несколько конфигураций psm)
                     for psm in (6, 4):
@@ -135,7 +389,9 @@ class OCRService:
                             text_tess = pytesseract.image_to_string(
                                 pil_img, lang='rus+eng', config=f'--oem 1 --psm {psm}'
                             )
-                        except Exception:
+                        except Exception as e:
+                            if _is_transient_ocr_error(e):
+                                raise
                             text_tess = ''
                         score_tess = self._score_text(text_tess)
                         if score_tess > best_score:
@@ -147,6 +403,10 @@ class OCRService:
             return extracted_text
             
         except Exception as e:
+            # Временные ошибки (нехватка памяти) пробрасываются, чтобы вызов можно было повторить
+            if _is_transient_ocr_error(e):
+                logger.error(f"Нехватка памяти при извлечении текста: {str(e)}")
+                raise
             logger.error(f"Ошибка при извлечении текста: {str(e)}")
             # Возвращаем пустую строку вместо исключения
             return ""
@@ -167,31 +427,96 @@ class OCRService:
         length_score = min(len(text) / 1000.0, 1.0)
         return 2.0 * cyr_ratio + 1.0 * word_density + 0.5 * length_score
     
-    def extract_text_with_confidence(self, image_data: bytes, min_confidence: float = 0.5) -> List[Dict[str, Any]]:
+    def extract_text_batched(self, images_data: List[bytes], batch_size: int = OCR_BATCH_SIZE,
+                             n_width: Optional[int] = None, n_height: Optional[int] = None) -> List[str]:
+        """
+        Пакетное извлечение текста из нескольких изображений
+        
+        Детектор EasyOCR обрабатывает изображения одного размера общим батчем
+        (readtext_batched), поэтому изображения группируются по размеру после предобработки.
+        Если заданы n_width и n_height, EasyOCR приводит все изображения к этому размеру
+        и они обрабатываются общими батчами независимо от исходного размера.
+        
+        Args:
+            images_data: Байты изображений
+            batch_size: Максимальное число изображений в одном батче детектора
+            n_width: Ширина, к которой приводятся изображения (вместе с n_height)
+            n_height: Высота, к которой приводятся изображения (вместе с n_width)
+            
+        Returns:
+            Извлеченные тексты в порядке изображений
+        """
+        try:
+            # Декодирование и предобработка всех изображений ставятся в общий пул сразу:
+            # пока детектор обрабатывает текущий батч, следующие изображения уже готовятся
+            processed = [_preprocess_executor.submit(self._load_and_preprocess, image_data)
+                         for image_data in images_data]
+            
+            # Без общего размера readtext_batched принимает только изображения одинакового размера,
+            # поэтому для группировки нужны все изображения; с общим размером группа одна
+            resize = n_width is not None and n_height is not None
+            groups: Dict[Tuple[int, ...], List[int]] = {}
+            for index, future in enumerate(processed):
+                image = future.result()
+                # Нераспознаваемые файлы пропускаются, их текст остается пустым
+                if image is not None:
+                    groups.setdefault(() if resize else image.shape, []).append(index)
+            
+            texts = [""] * len(processed)
+            for indices in groups.values():
+                for start in range(0, len(indices), batch_size):
+                    batch = indices[start:start + batch_size]
+                    batch_results = self.reader.readtext_batched(
+                        [processed[i].result() for i in batch], n_width=n_width, n_height=n_height
+                    )
+                    for i, results in zip(batch, batch_results):
+                        texts[i] = self._extract_text_from_results(results)
+            
+            logger.info(f"Пакетно обработано {len(texts)} изображений")
+            return texts
+            
+        except Exception as e:
+            logger.error(f"Ошибка при пакетном извлечении текста: {str(e)}")
+            return [""] * len(images_data)
+    
+    def _load_and_preprocess(self, image_data: bytes) -> Optional[np.ndarray]:
+        """Декодирование и предобработка одного изображения (выполняется в пуле потоков)"""
+        image = self._bytes_to_image(image_data)
+        if image is None:
+            return None
+        return self._preprocess_image(image)
+    
+    def extract_text_with_confidence(self, image_data: bytes, min_confidence: float = 0.5) -> Dict[str, Any]:
         """
         Извлечение текста с информацией о уверенности
         
+        Результат хранится параллельными массивами (structure of arrays), что позволяет
+        фильтровать и сортировать фрагменты векторно, например np.lexsort по координатам рамок.
+        
         Args:
             image_data: Байты изображения
             min_confidence: Минимальная уверенность для включения текста
             
         Returns:
-            Список словарей с текстом, координатами и уверенностью
+            Словарь с ключами texts (список строк), confidences (float32, форма (N,))
+            и bboxes (float32, форма (N, 4, 2)) для фрагментов с уверенностью не ниже min_confidence
         """
         try:
+            cache_key = self._text_cache_key('confidence', image_data, min_confidence)
+            cached = self._text_cache_get(cache_key)
+            if cached is not None:
+                return self._copy_confidence_result(cached)
+            
             image = self._bytes_to_image(image_data)
+            if image is None:
+                return self._results_to_arrays([], min_confidence)
             processed_image = self._preprocess_image(image)
             
             results = self.reader.readtext(processed_image)
             
-            filtered_results = []
-            for (bbox, text, confidence) in results:
-                if confidence >= min_confidence:
-                    filtered_results.append({
-                        'text': text,
-                        'confidence': confidence,
-                        'bbox': bbox
-                    })
+            filtered_results = self._results_to_arrays(results, min_confidence)
+            
+            self._text_cache_put(cache_key, self._copy_confidence_result(filtered_results))
             
             return filtered_results
             
@@ -199,14 +524,94 @@ class OCRService:
             logger.error(f"Ошибка при извлечении текста с уверенностью: {str(e)}")
             raise
     
-    def _bytes_to_image(self, image_data: bytes) -> np.ndarray:
-        """Конвертация байтов в изображение OpenCV"""
+    @staticmethod
+    def _results_to_arrays(results: List[Tuple], min_confidence: float) -> Dict[str, Any]:
+        """Фильтрация результатов EasyOCR по уверенности с переводом в параллельные массивы"""
+        count = len(results)
+        confidences = np.empty(count, dtype=np.float64)
+        bboxes = np.empty((count, 4, 2), dtype=np.float32)
+        for index, (bbox, _, confidence) in enumerate(results):
+            confidences[index] = confidence
+            bboxes[index] = bbox
+        
+        # Порог сравнивается в float64, чтобы граничные значения отбирались как раньше
+        mask = confidences >= min_confidence
+        return {
+            'texts': [result[1] for result, keep in zip(results, mask) if keep],
+            'confidences': confidences[mask].astype(np.float32),
+            'bboxes': bboxes[mask]
+        }
+    
+    @staticmethod
+    def _copy_confidence_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Копия результата extract_text_with_confidence (массивы изменяемы, кэш отдает копии)"""
+        return {
+            'texts': list(result['texts']),
+            'confidences': result['confidences'].copy(),
+            'bboxes': result['bboxes'].copy()
+        }
+    
+    async def extract_text_async(self, image_data: bytes, *, sem: Optional[asyncio.Semaphore] = None,
+                                 limiter: Optional[RateLimiter] = None) -> str:
+        """
+        Асинхронное извлечение текста: OCR выполняется в отдельном потоке, не блокируя event loop
+        
+        Args:
+            image_data: Байты изображения
+            sem: Семафор, ограничивающий число одновременных вызовов OCR
+            limiter: Ограничитель частоты вызовов
+            
+        Returns:
+            Извлеченный текст
+        """
+        return await self._run_async(self.extract_text, image_data, sem=sem, limiter=limiter)
+    
+    async def extract_text_with_confidence_async(self, image_data: bytes, min_confidence: float = 0.5, *,
+                                                 sem: Optional[asyncio.Semaphore] = None,
+                                                 limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+        """Асинхронный вариант extract_text_with_confidence (см. extract_text_async)"""
+        return await self._run_async(self.extract_text_with_confidence, image_data, min_confidence,
+                                     sem=sem, limiter=limiter)
+    
+    async def _run_async(self, func, *args, sem: Optional[asyncio.Semaphore] = None,
+                         limiter: Optional[RateLimiter] = None) -> Any:
+        """
+        Вызов блокирующего метода OCR в потоке с ограничением параллелизма и частоты
+        
+        Временные ошибки (нехватка памяти) повторяются с экспоненциальной задержкой;
+        на время задержки семафор освобождается.
+        """
+        delay = OCR_RETRY_BASE_DELAY
+        for attempt in range(1, OCR_RETRY_ATTEMPTS + 1):
+            try:
+                async with (sem or contextlib.nullcontext()):
+                    if limiter is not None:
+                        await limiter.wait()
+                    return await asyncio.to_thread(func, *args)
+            except Exception as e:
+                if attempt == OCR_RETRY_ATTEMPTS or not _is_transient_ocr_error(e):
+                    raise
+                logger.warning(f"Временная ошибка OCR (попытка {attempt}/{OCR_RETRY_ATTEMPTS}), "
+                               f"повтор через {delay:.0f} с: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, OCR_RETRY_MAX_DELAY)
+    
+    def _bytes_to_image(self, image_data: bytes) -> Optional[np.ndarray]:
+        """Конвертация байтов в изображение OpenCV (None, если данные не являются изображением)"""
         try:
             # Проверка, что данные не пустые
             if not image_data:
                 raise ValueError("Пустые данные изображения")
             
-            # Использование PIL для чтения изображения
+            # OpenCV декодирует сразу в BGR (ориентация EXIF не применяется, как и в PIL)
+            image = cv2.imdecode(
+                np.frombuffer(image_data, np.uint8),
+                cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+            )
+            if image is not None and image.size > 0:
+                return image
+            
+            # Форматы, которые не поддерживает OpenCV, читаются через PIL
             pil_image = Image.open(io.BytesIO(image_data))
             
             # Проверка, что изображение загружено
@@ -230,9 +635,7 @@ class OCRService:
             
         except Exception as e:
             logger.error(f"Ошибка конвертации байтов в изображение: {str(e)}")
-            # Создаем простое тестовое изображение
-            test_image = np.ones((100, 100, 3), dtype=np.uint8) * 255
-            return test_image
+            return None
     
     def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """
@@ -246,11 +649,12 @@ class OCRService:
             Обработанное изображение
         """
         try:
-            # Конвертация в оттенки серого
+            # Конвертация в оттенки серого (исходное изображение дальше не изменяется,
+            # поэтому одноканальный вход используется без копирования)
             if len(image.shape) == 3:
                 gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             else:
-                gray = image.copy()
+                gray = image
             
             # Значительное увеличение размера для мелкого текста
             height, width = gray.shape
@@ -259,29 +663,38 @@ class OCRService:
                 new_width = int(width * scale_factor)
                 new_height = int(height * scale_factor)
                 gray = cv2.resize(gray, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
+            elif min(height, width) > self.max_short_side:
+                # Сверхкрупные сканы уменьшаются: все последующие этапы линейны по числу пикселей,
+                # а детектор EasyOCR все равно сжимает изображение до canvas_size
+                scale_factor = self.max_short_side / min(height, width)
+                new_width = int(width * scale_factor)
+                new_height = int(height * scale_factor)
+                gray = cv2.resize(gray, (new_width, new_height), interpolation=cv2.INTER_AREA)
             
-            # Нормализация освещения
-            normalized = cv2.convertScaleAbs(gray, alpha=1.2, beta=10)
+            # Нормализация освещения; дальнейшие этапы работают на месте в одном буфере,
+            # чтобы не держать в памяти копию кадра на каждый шаг
+            processed = cv2.convertScaleAbs(gray, alpha=1.2, beta=10)
             
             # Гауссово размытие для сглаживания
-            blurred = cv2.GaussianBlur(normalized, (3, 3), 0)
+            cv2.GaussianBlur(processed, (3, 3), 0, dst=processed)
             
             # Улучшение контраста специально для текста
+            # (объект CLAHE создается на каждый вызов: он не потокобезопасен)
             clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(16,16))
-            enhanced = clahe.apply(blurred)
+            clahe.apply(processed, dst=processed)
             
             # Простая бинаризация по Оцу (часто лучше для текста)
-            _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            cv2.threshold(processed, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=processed)
             
             # Инвертируем если нужно (темный текст на светлом фоне)
-            if cv2.mean(binary)[0] < 127:
-                binary = cv2.bitwise_not(binary)
+            if cv2.mean(processed)[0] < 127:
+                cv2.bitwise_not(processed, dst=processed)
             
             # Легкая морфологическая обработка для очистки
             kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2, 2))
-            cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, iterations=1)
+            cv2.morphologyEx(processed, cv2.MORPH_CLOSE, kernel, dst=processed, iterations=1)
             
-            return cleaned
+            return processed
             
         except Exception as e:
             logger.error(f"Ошибка предобработки изображения: {str(e)}")
@@ -298,12 +711,9 @@ class OCRService:
             Объединенный текст
         """
         try:
-            texts = []
-            for (bbox, text, confidence) in results:
-                if confidence > 0.4:  # Повышаем порог уверенности
-                    # Применяем постобработку для исправления ошибок OCR
-                    corrected_text = self._correct_ocr_errors(text.strip())
-                    texts.append(corrected_text)
+            # Повышенный порог уверенности и постобработка для исправления ошибок OCR
+            correct = self._correct_ocr_errors
+            texts = [correct(text.strip()) for _, text, confidence in results if confidence > 0.4]
             
             # Объединение текста с сохранением порядка
             full_text = ' '.join(texts)
@@ -325,47 +735,13 @@ class OCRService:
             Исправленный текст
         """
         try:
-            # Словарь для исправления типичных ошибок OCR русского текста
-            corrections = {
-                # Частые замены латинских символов на кириллические
-                'a': 'а', 'A': 'А', 'B': 'В', 'C': 'С', 'E': 'Е', 'H': 'Н',
-                'K': 'К', 'M': 'М', 'O': 'О', 'P': 'Р', 'T': 'Т', 'X': 'Х',
-                'Y': 'У', 'c': 'с', 'e': 'е', 'o': 'о', 'p': 'р', 'x': 'х',
-                'y': 'у', 'r': 'г', 'u': 'и', 'n': 'п', 'b': 'б', 'd': 'д',
-                '6': 'б', '9': 'я', 'I': 'І', 'l': 'л', '1': 'І',
-                
-                # Исправление частых слов и фраз
-                'TOO': 'ТОО', 'OOO': 'ООО', 'LLC': 'ЛЛС',
-                'AOBOP': 'ДОГОВОР', 'roBoр': 'ДОГОВОР', 'AoroBop': 'Договор',
-                'KyrrJrrr': 'Кыргыз', 'Anruarrr': 'Алматы', 'Anruarr': 'Алматы',
-                'AoroBopa': 'Договора', 'Cropourr': 'Сторон', 'Cropon': 'Сторон',
-                'rpoAalrur': 'рамочный', 'O6oy4onauus': 'обслуживание',
-                'aKaзчик': 'Заказчик', 'oMnaния': 'Компания', 'омпания': 'Компания',
-                'ТОО': 'ТОО', 'редприятие': 'Предприятие', 'едприятие': 'Предприятие',
-                'редмет': 'Предмет', 'оимость': 'Стоимость', 'Tоимость': 'Стоимость',
-            }
+            # Латинские символы и цифры заменяются за один проход
+            corrected = text.translate(_CHAR_CORRECTIONS)
             
-            corrected = text
-            
-            # Применяем исправления
-            for wrong, correct in corrections.items():
+            # Исправление частых слов и фраз
+            for wrong, correct in _WORD_CORRECTIONS:
                 corrected = corrected.replace(wrong, correct)
             
-            # Дополнительные правила для русского текста
-            import re
-            
-            # Исправляем смешанные слова (латиница + кириллица)
-            mixed_words = re.findall(r'\b[a-zA-Zа-яё]+\b', corrected)
-            for word in mixed_words:
-                if any(char in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ' for char in word) and \
-                   any(char in 'абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ' for char in word):
-                    # Пытаемся исправить смешанное слово
-                    fixed_word = word
-                    for lat, cyr in corrections.items():
-                        if len(lat) == 1 and len(cyr) == 1:  # Только одиночные символы
-                            fixed_word = fixed_word.replace(lat, cyr)
-                    corrected = corrected.replace(word, fixed_word)
-            
             return corrected
             
         except Exception as e:
@@ -384,6 +760,14 @@ class OCRService:
         """
         try:
             image = self._bytes_to_image(image_data)
+            if image is None:
+                return {
+                    'full_text': '',
+                    'columns': [],
+                    'columns_count': 0,
+                    'column_info': [],
+                    'has_multiple_columns': False
+                }
             processed_image = self._preprocess_image(image)
             
             # OCR распознавание
@@ -450,13 +834,11 @@ class OCRService:
             if len(filtered_results) < 2:
                 return []
             
-            # Сначала пытаемся найти столбцы по X-координатам
-            x_coords = []
-            for (bbox, text, confidence) in filtered_results:
-                avg_x = sum([point[0] for point in bbox]) / len(bbox)
-                x_coords.append(avg_x)
+            # Центры элементов по X вычисляются один раз для всех этапов анализа
+            centers_x = [sum([point[0] for point in bbox]) / len(bbox) for (bbox, text, confidence) in filtered_results]
             
-            x_coords.sort()
+            # Сначала пытаемся найти столбцы по X-координатам
+            x_coords = sorted(centers_x)
             
             # Находим разрыв между столбцами
             max_gap = 0
@@ -478,9 +860,7 @@ class OCRService:
                 left_column = []
                 right_column = []
                 
-                for (bbox, text, confidence) in filtered_results:
-                    avg_x = sum([point[0] for point in bbox]) / len(bbox)
-                    
+                for (bbox, text, confidence), avg_x in zip(filtered_results, centers_x):
                     if avg_x < split_x:
                         left_column.append((bbox, text, confidence, avg_x))
                     else:
@@ -518,13 +898,11 @@ class OCRService:
             russian_items = []
             english_items = []
             
-            for (bbox, text, confidence) in filtered_results:
+            for (bbox, text, confidence), avg_x in zip(filtered_results, centers_x):
                 language = self._detect_language([text])
                 if language == 'ru':
-                    avg_x = sum([point[0] for point in bbox]) / len(bbox)
                     russian_items.append((bbox, text, confidence, avg_x))
                 elif language == 'en':
-                    avg_x = sum([point[0] for point in bbox]) / len(bbox)
                     english_items.append((bbox, text, confidence, avg_x))
             
             # Если есть элементы на обоих языках, создаем столбцы
@@ -596,14 +974,17 @@ class OCRService:
             if not columns_info:
                 # Если столбцы не обнаружены, создаем один "столбец" со всем текстом
                 if results:
-                    all_text = ' '.join([text for (bbox, text, confidence) in results if confidence > 0.3])
+                    # Уверенно распознанные элементы отбираются один раз
+                    texts = [text for (bbox, text, confidence) in results if confidence > 0.3]
+                    confidences = [confidence for (bbox, text, confidence) in results if confidence > 0.3]
+                    all_text = ' '.join(texts)
                     if all_text.strip():
                         column_texts.append({
                             'text': all_text,
                             'side': 'single',
-                            'language': self._detect_language([text for (bbox, text, confidence) in results if confidence > 0.3]),
-                            'items_count': len([r for r in results if r[2] > 0.3]),
-                            'confidence_avg': sum([r[2] for r in results if r[2] > 0.3]) / len([r for r in results if r[2] > 0.3]) if results else 0
+                            'language': self._detect_language(texts),
+                            'items_count': len(texts),
+                            'confidence_avg': sum(confidences) / len(confidences)
                         })
                 return column_texts
             
@@ -646,9 +1027,14 @@ class OCRService:
             # Объединяем все тексты
             full_text = ' '.join(texts).lower()
             
-            # Простая эвристика для определения языка
-            cyrillic_chars = sum(1 for char in full_text if 'а' <= char <= 'я' or 'А' <= char <= 'Я')
-            latin_chars = sum(1 for char in full_text if 'a' <= char <= 'z' or 'A' <= char <= 'Z')
+            # Простая эвристика для определения языка: подсчет букв по массиву кодов символов
+            codes = np.frombuffer(full_text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+            cyrillic_chars = np.count_nonzero(
+                ((codes >= ord('а')) & (codes <= ord('я'))) | ((codes >= ord('А')) & (codes <= ord('Я')))
+            )
+            latin_chars = np.count_nonzero(
+                ((codes >= ord('a')) & (codes <= ord('z'))) | ((codes >= ord('A')) & (codes <= ord('Z')))
+            )
             
             if cyrillic_chars > latin_chars:
                 return 'ru'
@@ -674,4 +1060,5 @@ class OCRService:
         """
         self.languages = languages
         self._initialize_reader()
+        self.clear_text_cache()
         logger.info(f"Языки изменены на: {languages}")
@@ -1,7 +1,6 @@
 import io
 import logging
 from typing import List, Optional, Dict, Any
-from PIL import Image
 import PyPDF2
 from pdf2image import convert_from_bytes
 import numpy as np
@@ -108,11 +107,10 @@ class PDFProcessor:
             for i, image in enumerate(images):
                 logger.info(f"Обработка страницы {i+1} из {len(images)}")
                 
-                # Конвертируем numpy array в байты
-                img_byte_arr = io.BytesIO()
-                pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-                pil_image.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
+                # Конвертируем numpy array в байты: несжатый BMP кодируется без затрат
+                # на deflate, а страница сразу же декодируется OCR сервисом
+                _, encoded = cv2.imencode('.bmp', image)
+                img_byte_arr = encoded.tobytes()
                 
                 # Обрабатываем через OCR с анализом столбцов
                 page_result = ocr_service.extract_text_with_columns(img_byte_arr)
@@ -202,9 +200,9 @@ class PDFProcessor:
             for i, image in enumerate(images):
                 logger.info(f"Обработка страницы {i+1} из {len(images)}")
                 
-                # Конвертируем PIL изображение в байты
+                # Конвертируем PIL изображение в байты (несжатый BMP: без затрат на deflate)
                 img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format='PNG')
+                image.save(img_byte_arr, format='BMP')
                 img_byte_arr = img_byte_arr.getvalue()
                 
                 # Обрабатываем через OCR
@@ -0,0 +1,23 @@
+"""
+Асинхронный ограничитель частоты вызовов (общий для сервиса OCR и демонстрационных скриптов)
+"""
+
+import asyncio
+import time
+
+class RateLimiter:
+    """Ограничитель частоты запросов: выдерживает минимальный интервал между запросами"""
+    
+    def __init__(self, rps: float):
+        self._interval = 1.0 / rps
+        self._next = 0.0
+    
+    async def wait(self):
+        """Ожидание очередного слота для запроса"""
+        # Слот резервируется без await, поэтому внутри event loop операция атомарна
+        now = time.monotonic()
+        delay = max(0.0, self._next - now)
+        self._next = max(now, self._next) + self._interval
+        
+        if delay:
+            await asyncio.sleep(delay)
@@ -28,15 +28,15 @@ def main():
         logger.info(f"Сервер будет доступен по адресу: http://{Config.HOST}:{Config.PORT}")
         logger.info(f"Режим отладки: {Config.DEBUG}")
         logger.info(f"Языки OCR: {Config.OCR_LANGUAGES}")
-        logger.info(f"GPU для OCR: {Config.OCR_GPU_ENABLED}")
+        logger.info(f"Устройство OCR: {Config.OCR_DEVICE}")
         
-        # Запуск сервера
+        # Запуск сервера (uvloop и httptools из uvicorn[standard] выбираются автоматически)
         uvicorn.run(
             "main:app",
             host=Config.HOST,
             port=Config.PORT,
             reload=Config.DEBUG,
-            workers=1,  # Используем только 1 воркер для Windows
+            workers=Config.SERVER_WORKERS,  # По умолчанию 1 воркер (Windows)
             log_level=Config.LOG_LEVEL.lower(),
             access_log=True
         )
@@ -0,0 +1,63 @@
+"""
+Общие фикстуры модульных тестов (сервер и модели OCR не требуются)
+"""
+
+import os
+import sys
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Движки OCR в модульных тестах не запускаются: если библиотеки не установлены,
+# для импорта ocr_service подставляются пустые модули, Reader подменяется фикстурой
+for _module_name in ('easyocr', 'pytesseract'):
+    try:
+        __import__(_module_name)
+    except ImportError:
+        sys.modules[_module_name] = types.ModuleType(_module_name)
+
+import ocr_service
+
+class FakeReader:
+    """Заглушка easyocr.Reader: возвращает заданные результаты, первые failures вызовов падают"""
+    
+    device = 'cpu'
+    
+    def __init__(self, results=None, failures=0, error=None):
+        self.results = results if results is not None else [
+            ([[0, 0], [10, 0], [10, 5], [0, 5]], 'Привет мир', 0.9)
+        ]
+        self.failures = failures
+        self.error = error or RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+        self.calls = 0
+    
+    def readtext(self, image, **kwargs):
+        self.calls += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        return list(self.results)
+
+@pytest.fixture
+def make_ocr_service(monkeypatch):
+    """Фабрика OCRService с заглушками EasyOCR и Tesseract"""
+    monkeypatch.setattr(ocr_service, 'pytesseract', types.SimpleNamespace(
+        image_to_string=lambda *args, **kwargs: '',
+        image_to_osd=lambda *args, **kwargs: '',
+    ))
+    
+    def factory(reader=None, **kwargs):
+        reader = reader or FakeReader()
+        monkeypatch.setattr(ocr_service, 'get_reader', lambda languages, device='cpu': reader)
+        return ocr_service.OCRService(device='cpu', **kwargs)
+    
+    return factory
+
+def png_bytes(width=40, height=30, value=255):
+    """PNG-изображение заданного размера и яркости"""
+    image = np.full((height, width, 3), value, dtype=np.uint8)
+    return cv2.imencode('.png', image)[1].tobytes()
@@ -0,0 +1,83 @@
+import pytest
+
+from data_extractor import DataExtractor, MIN_CACHED_TEXT_LENGTH
+
+DOCUMENT = 'Договор поставки. Email: Info@Example.ru, телефон +7 (999) 123-45-67, ИНН: 7707083893'
+
+PARITY_TEXTS = [
+    DOCUMENT,
+    'Анкета клиента ФИО: Петров Петр Телефон: 8 912 345 67 89 Дата: 12.03.2024',
+    'Имя: Иванов И.И.\nEmail: Test@Mail.COM\nСумма: 1 000,50 руб.\nДата: 2024-01-05',
+    'Адрес: г. Москва, ул. Ленина, д. 1 ООО "Ромашка" ИНН 7707083893 ₽ 300',
+    'клиент паспорт 4510 123456 Договор № 123/45',
+    '',
+]
+
+def test_extract_cache_hit_returns_independent_copy():
+    extractor = DataExtractor()
+    
+    first = extractor.extract_fields(DOCUMENT)
+    first['email'] = 'changed'
+    second = extractor.extract_fields(DOCUMENT)
+    
+    assert second['email'] == 'info@example.ru'
+    assert extractor.extract_cache_info()['hits'] == 1
+
+def test_extract_cache_separates_expected_fields():
+    extractor = DataExtractor()
+    
+    assert set(extractor.extract_fields(DOCUMENT, ['email'])) == {'email'}
+    assert 'phone' in extractor.extract_fields(DOCUMENT)
+    assert extractor.extract_cache_info()['hits'] == 0
+
+def test_extract_cache_eviction_respects_cache_size():
+    extractor = DataExtractor(cache_size=2)
+    
+    for index in (1, 2, 3, 1):
+        extractor.extract_fields(f'{DOCUMENT} № {index}')
+    
+    info = extractor.extract_cache_info()
+    assert info['size'] == 2
+    assert info['evictions'] == 2
+    assert info['hits'] == 0
+
+def test_extract_cache_keys_do_not_hold_texts():
+    extractor = DataExtractor()
+    
+    extractor.extract_fields(DOCUMENT * 100)
+    
+    ((digest, fields),) = extractor._extract_cache
+    assert isinstance(digest, bytes) and len(digest) == 16
+    assert fields is None
+
+def test_short_texts_are_not_cached():
+    extractor = DataExtractor()
+    
+    extractor.extract_fields('x' * (MIN_CACHED_TEXT_LENGTH - 1))
+    
+    assert extractor.extract_cache_info()['size'] == 0
+
+def test_add_custom_field_pattern_clears_extract_cache():
+    extractor = DataExtractor()
+    text = f'{DOCUMENT}, артикул: AB-123'
+    
+    assert 'article' not in extractor.extract_fields(text)
+    extractor.add_custom_field_pattern('article', [r'артикул:\s*([A-Z]{2}-\d+)'])
+    
+    assert extractor.extract_cache_info()['size'] == 0
+    assert extractor.extract_fields(text)['article'] == 'AB-123'
+
+def test_hyperscan_matches_re_extraction():
+    pytest.importorskip('hyperscan')
+    extractor = DataExtractor(cache_size=0)
+    reference = DataExtractor(cache_size=0)
+    reference._hs_db = None
+    
+    assert extractor._hs_db is not None
+    for text in PARITY_TEXTS:
+        assert extractor.extract_fields(text) == reference.extract_fields(text)
+
+def test_hyperscan_database_is_shared_between_instances():
+    pytest.importorskip('hyperscan')
+    
+    assert DataExtractor()._hs_db is DataExtractor()._hs_db
@@ -0,0 +1,66 @@
+import pytest
+
+from metrics_calculator import MetricsCalculator, VECTORIZED_CHARS_MIN_LENGTH
+
+def set_counts(extracted, ground_truth):
+    extracted_chars, ground_truth_chars = set(extracted), set(ground_truth)
+    return len(extracted_chars & ground_truth_chars), len(extracted_chars), len(ground_truth_chars)
+
+@pytest.mark.parametrize('extracted, ground_truth', [
+    ('Договор ' * 50, 'Договор № 1 ' * 40),
+    ('a' * VECTORIZED_CHARS_MIN_LENGTH + '\ud800', 'ab\ud800'),
+    ('\udfff' * VECTORIZED_CHARS_MIN_LENGTH, 'x\udfff'),
+    ('emoji 😀' * 60, 'emoji'),
+])
+def test_count_unique_chars_matches_set_path(extracted, ground_truth):
+    assert MetricsCalculator._count_unique_chars(extracted, ground_truth) == set_counts(extracted, ground_truth)
+
+def test_lone_surrogate_in_long_text_is_measured():
+    # JSON-строка "\ud800" декодируется в одиночный суррогат
+    text = 'a' * VECTORIZED_CHARS_MIN_LENGTH + '\ud800'
+    calculator = MetricsCalculator()
+    
+    metrics = calculator.calculate_all_metrics(text, text[:-1] + 'b')
+    assert metrics['cer'] == pytest.approx(1 / len(text))
+    
+    character_metrics = calculator.calculate_character_metrics(text, text)
+    assert character_metrics['char_precision'] == 1.0
+    assert character_metrics['char_recall'] == 1.0
+
+def test_metrics_cache_hit_returns_independent_copy():
+    calculator = MetricsCalculator()
+    
+    first = calculator.calculate_all_metrics('Договор № 1', 'Договор № 7')
+    first['cer'] = -1.0
+    second = calculator.calculate_all_metrics('Договор № 1', 'Договор № 7')
+    
+    assert second['cer'] > 0
+    assert calculator.metrics_cache_info()['hits'] == 1
+
+def test_metrics_cache_eviction_respects_cache_size():
+    calculator = MetricsCalculator(cache_size=2)
+    
+    for text in ('a', 'b', 'c', 'a'):
+        calculator.calculate_all_metrics(text, 'abc')
+    
+    info = calculator.metrics_cache_info()
+    assert info['size'] == 2
+    assert info['evictions'] == 2
+    assert info['hits'] == 0
+
+def test_metrics_cache_keys_do_not_hold_texts():
+    calculator = MetricsCalculator()
+    text = 'Страница документа ' * 1000
+    
+    calculator.calculate_all_metrics(text, text + '.')
+    
+    (key,) = calculator._metrics_cache
+    assert all(isinstance(part, bytes) and len(part) == 16 for part in key)
+
+def test_metrics_cache_can_be_disabled():
+    calculator = MetricsCalculator(cache_size=0)
+    
+    calculator.calculate_all_metrics('a', 'b')
+    calculator.calculate_all_metrics('a', 'b')
+    
+    assert calculator.metrics_cache_info() == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 0}
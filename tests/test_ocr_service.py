@@ -0,0 +1,152 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import ocr_service
+from conftest import FakeReader, png_bytes
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(ocr_service, 'OCR_RETRY_BASE_DELAY', 0.0)
+
+def test_extract_text_async_retries_out_of_memory(make_ocr_service, monkeypatch):
+    reader = FakeReader(failures=1)
+    service = make_ocr_service(reader, cache_size=0)
+    attempts = []
+    extract_text = service.extract_text
+    
+    def counting_extract_text(image_data):
+        attempts.append(image_data)
+        return extract_text(image_data)
+    
+    monkeypatch.setattr(service, 'extract_text', counting_extract_text)
+    
+    assert asyncio.run(service.extract_text_async(png_bytes())) == 'Привет мир'
+    assert len(attempts) == 2
+
+def test_extract_text_async_gives_up_after_retry_attempts(make_ocr_service):
+    reader = FakeReader(failures=100)
+    service = make_ocr_service(reader, cache_size=0)
+    
+    with pytest.raises(RuntimeError, match='out of memory'):
+        asyncio.run(service.extract_text_async(png_bytes()))
+    assert reader.calls == ocr_service.OCR_RETRY_ATTEMPTS
+
+def test_run_async_does_not_retry_other_errors(make_ocr_service):
+    service = make_ocr_service()
+    calls = []
+    
+    def fail():
+        calls.append(1)
+        raise ValueError("bad image")
+    
+    with pytest.raises(ValueError):
+        asyncio.run(service._run_async(fail))
+    assert len(calls) == 1
+
+def test_extract_text_swallows_other_errors(make_ocr_service):
+    # Прочие ошибки распознавания одного варианта не прерывают извлечение текста
+    service = make_ocr_service(FakeReader(failures=1, error=ValueError("bad image")))
+    
+    assert service.extract_text(png_bytes()) == 'Привет мир'
+
+def test_extract_text_propagates_out_of_memory(make_ocr_service):
+    service = make_ocr_service(FakeReader(failures=1))
+    
+    with pytest.raises(RuntimeError, match='out of memory'):
+        service.extract_text(png_bytes())
+    # Ошибка не кэшируется: следующий вызов распознает текст
+    assert service.extract_text(png_bytes()) == 'Привет мир'
+
+@pytest.mark.parametrize('texts, language', [
+    (['Договор поставки', 'ООО Ромашка'], 'ru'),
+    (['Supply agreement'], 'en'),
+    (['Договор \ud800'], 'ru'),
+    (['agreement \udc00'], 'en'),
+    (['123'], 'mixed'),
+    ([], 'unknown'),
+])
+def test_detect_language(make_ocr_service, texts, language):
+    assert make_ocr_service()._detect_language(texts) == language
+
+def test_text_cache_hit_skips_recognition(make_ocr_service):
+    reader = FakeReader()
+    service = make_ocr_service(reader)
+    
+    assert service.extract_text(png_bytes()) == 'Привет мир'
+    calls = reader.calls
+    assert service.extract_text(png_bytes()) == 'Привет мир'
+    
+    assert reader.calls == calls
+    assert service.text_cache_info()['hits'] == 1
+
+def test_text_cache_eviction_respects_cache_size(make_ocr_service):
+    service = make_ocr_service(cache_size=2)
+    
+    for value in (200, 220, 240, 200):
+        service.extract_text(png_bytes(value=value))
+    
+    info = service.text_cache_info()
+    assert info['size'] == 2
+    assert info['evictions'] == 2
+    assert info['hits'] == 0
+
+def test_set_languages_clears_text_cache(make_ocr_service):
+    service = make_ocr_service()
+    service.extract_text(png_bytes())
+    
+    service.set_languages(['en'])
+    
+    assert service.text_cache_info()['size'] == 0
+
+CONFIDENCE_RESULTS = [
+    ([[0, 0], [10, 0], [10, 5], [0, 5]], 'Договор', 0.3),
+    ([[0, 6], [10, 6], [10, 11], [0, 11]], 'поставки', 0.2999999999),
+    ([[0, 12], [10, 12], [10, 17], [0, 17]], 'ООО', 0.5),
+    ([[0, 18], [10, 18], [10, 23], [0, 23]], 'Ромашка', 0.97),
+]
+
+@pytest.mark.parametrize('min_confidence', [0.0, 0.2999999999, 0.3, 0.5, 0.9, 1.0])
+def test_confidence_arrays_filter_like_list_of_dicts(make_ocr_service, min_confidence):
+    service = make_ocr_service(FakeReader(CONFIDENCE_RESULTS), cache_size=0)
+    # Прежний формат: список словарей с уверенностью не ниже порога
+    expected = [
+        {'text': text, 'confidence': confidence, 'bbox': bbox}
+        for bbox, text, confidence in CONFIDENCE_RESULTS
+        if confidence >= min_confidence
+    ]
+    
+    result = service.extract_text_with_confidence(png_bytes(), min_confidence)
+    
+    assert result['texts'] == [item['text'] for item in expected]
+    assert result['confidences'].dtype == np.float32
+    assert result['confidences'].shape == (len(expected),)
+    np.testing.assert_array_equal(
+        result['confidences'], np.array([item['confidence'] for item in expected], dtype=np.float32)
+    )
+    assert result['bboxes'].shape == (len(expected), 4, 2)
+    np.testing.assert_array_equal(
+        result['bboxes'], np.array([item['bbox'] for item in expected], dtype=np.float32).reshape(-1, 4, 2)
+    )
+
+def test_confidence_cache_hit_returns_independent_copy(make_ocr_service):
+    service = make_ocr_service(FakeReader(CONFIDENCE_RESULTS))
+    
+    first = service.extract_text_with_confidence(png_bytes())
+    first['texts'].append('лишний')
+    first['confidences'][:] = 0
+    first['bboxes'][:] = -1
+    second = service.extract_text_with_confidence(png_bytes())
+    
+    assert service.text_cache_info()['hits'] == 1
+    assert second['texts'] == ['ООО', 'Ромашка']
+    np.testing.assert_array_equal(second['confidences'], np.array([0.5, 0.97], dtype=np.float32))
+    assert (second['bboxes'] >= 0).all()
+
+def test_confidence_cache_separates_min_confidence(make_ocr_service):
+    service = make_ocr_service(FakeReader(CONFIDENCE_RESULTS))
+    
+    assert len(service.extract_text_with_confidence(png_bytes(), 0.3)['texts']) == 3
+    assert len(service.extract_text_with_confidence(png_bytes(), 0.9)['texts']) == 1
+    assert service.text_cache_info()['hits'] == 0